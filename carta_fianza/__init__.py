@@ -0,0 +1,4 @@
+"""
+Logica compartida de los scripts de Carta Fianza (limpieza, emparejamiento
+y utilidades sobre la BD).
+"""
@@ -0,0 +1,20 @@
+"""
+Escritura de JSON compartida por el checkpoint, los shards, el indice de
+la BD y el sidecar de resultados crudos.
+"""
+import json
+import os
+
+def valor_json(valor):
+    """Convierte escalares de numpy a tipos de Python para json.dumps (default=)."""
+    # Los valores de la BD llegan como escalares de numpy (int64, etc.)
+    if hasattr(valor, 'item'):
+        return valor.item()
+    raise TypeError(f"No se puede guardar {type(valor).__name__} en JSON")
+
+def escribir_json_atomico(ruta, contenido):
+    """Escribe a un temporal y renombra, para que otro nodo nunca lea un archivo a medias."""
+    temporal = f'{ruta}.tmp-{os.getpid()}'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, ensure_ascii=False, default=valor_json)
+    os.replace(temporal, ruta)
@@ -0,0 +1,452 @@
+"""
+Ejecucion canalizada (carta-fianza.py --canalizado).
+
+La hoja de entrada se procesa por bloques de filas en cuatro etapas que
+corren a la vez, unidas por colas acotadas:
+
+    lectura (openpyxl, en streaming) -> limpieza -> emparejamiento -> escritura
+
+Mientras un bloque se empareja, el siguiente se va leyendo y el anterior ya
+se esta escribiendo, asi que el parseo y la escritura del Excel se solapan
+con el emparejamiento. El emparejamiento se reparte en procesos (workers)
+para no competir por el GIL con las otras etapas. Las colas son FIFO y los
+bloques se entregan en el orden en que entraron: el reporte sale en el mismo
+orden y con los mismos valores que la ejecucion normal.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+
+from .limpieza import leer_input, preparar_input, preparar_bd
+from .emparejamiento import emparejar
+from .indice import IndiceBD, emparejar_indice
+from .reporte import POLITICAS_SEMAFORO, calcular_semaforo, armar_reporte, colorear_celdas
+
+TAMANO_BLOQUE = 250      # filas de entrada por bloque
+BLOQUES_EN_COLA = 4      # bloques que puede acumular cada cola antes de frenar a la etapa anterior
+
+# ==========================================
+# ETAPAS EN HILOS UNIDAS POR COLAS ACOTADAS
+# ==========================================
+
+def _poner(cola, elemento, detener):
+    """put() que se rinde si el consumidor ya no va a leer."""
+    while not detener.is_set():
+        try:
+            cola.put(elemento, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+# Segundos que cada hilo paso esperando en la cola de la etapa anterior
+_esperas = threading.local()
+
+def _espera_acumulada():
+    return getattr(_esperas, 'segundos', 0.0)
+
+class EnHilo:
+    """
+    Corre el iterable bloques en un hilo propio; iterar sobre EnHilo devuelve
+    sus resultados a traves de una cola de maximo elementos. Un error en el
+    hilo se relanza en quien consume, y close() (o dejar de iterar) detiene la
+    etapa y las anteriores. tiempos[nombre] acumula el tiempo que la etapa
+    estuvo trabajando: no cuenta la espera para dejar un bloque en su cola ni
+    la espera por la cola de la etapa anterior (que se mide al iterarla).
+    """
+
+    def __init__(self, bloques, nombre, tiempos, maximo=BLOQUES_EN_COLA):
+        self.bloques = bloques
+        self.nombre = nombre
+        self.tiempos = tiempos
+        self.cola = queue.Queue(maxsize=maximo)
+        self.detener = threading.Event()
+        tiempos[nombre] = 0.0
+        threading.Thread(target=self._producir, name=f'carta-fianza-{nombre}', daemon=True).start()
+
+    def _producir(self):
+        iterador = iter(self.bloques)
+        try:
+            while True:
+                inicio = time.perf_counter()
+                espera = _espera_acumulada()
+                try:
+                    elemento = next(iterador)
+                except StopIteration:
+                    break
+                finally:
+                    transcurrido = time.perf_counter() - inicio
+                    self.tiempos[self.nombre] += transcurrido - (_espera_acumulada() - espera)
+                if not _poner(self.cola, ('bloque', elemento), self.detener):
+                    return
+            _poner(self.cola, ('fin', None), self.detener)
+        except BaseException as e:  # se relanza en el consumidor
+            _poner(self.cola, ('error', e), self.detener)
+        finally:
+            # Si la etapa anterior tambien es un EnHilo (o un generador), se la detiene
+            if hasattr(iterador, 'close'):
+                iterador.close()
+
+    def __iter__(self):
+        try:
+            while True:
+                inicio = time.perf_counter()
+                tipo, valor = self.cola.get()
+                _esperas.segundos = _espera_acumulada() + time.perf_counter() - inicio
+                if tipo == 'fin':
+                    return
+                if tipo == 'error':
+                    raise valor
+                yield valor
+        finally:
+            self.close()
+
+    def close(self):
+        self.detener.set()
+
+# ==========================================
+# LECTURA DE LA HOJA DE ENTRADA POR BLOQUES
+# ==========================================
+
+def _valor_celda(celda):
+    """Misma conversion que read_excel con openpyxl."""
+    if celda.value is None:
+        return ""
+    if celda.data_type == 'e':
+        return float('nan')
+    if celda.data_type == 'n':
+        entero = int(celda.value)
+        return entero if entero == celda.value else float(celda.value)
+    return celda.value
+
+def _a_tabla(encabezado, filas, inicio):
+    """
+    DataFrame de un bloque con los valores tal como salen de _valor_celda.
+    dtype=object, igual que leer_input: ningun bloque adivina sus propios tipos
+    (una columna IDC con '00123' no se vuelve 123), asi el reporte no depende de
+    donde se corta. Las celdas vacias (y 'NA', 'N/A', ...) quedan como NaN.
+    """
+    ancho = max(len(encabezado), *(len(fila) for fila in filas))
+    datos = [encabezado + [""] * (ancho - len(encabezado))]
+    datos += [fila + [""] * (ancho - len(fila)) for fila in filas]
+    df = TextParser(datos, header=0, dtype=object).read()
+    df.index = pd.RangeIndex(inicio, inicio + len(df))
+    return df
+
+def abrir_hoja(archivo, hoja):
+    """Abre el libro en modo streaming; ValueError si la hoja no existe (como read_excel)."""
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    if hoja not in libro.sheetnames:
+        libro.close()
+        raise ValueError(f"Worksheet named '{hoja}' not found")
+    return libro, libro[hoja]
+
+def leer_bloques(libro, hoja_excel, tamano=TAMANO_BLOQUE):
+    """
+    Lee la hoja en streaming y va entregando DataFrames de tamano filas con
+    el indice que tendrian en read_excel (0, 1, ...), asi el checkpoint y los
+    resultados crudos usan las mismas filas que la ejecucion normal.
+    Cierra el libro al terminar.
+    """
+    try:
+        hoja_excel.reset_dimensions()
+
+        encabezado = None
+        filas = []
+        vacias = []      # filas vacias pendientes: read_excel quita las del final
+        inicio = 0
+        for fila_excel in hoja_excel.rows:
+            fila = [_valor_celda(celda) for celda in fila_excel]
+            while fila and fila[-1] == "":
+                fila.pop()
+            if encabezado is None:
+                encabezado = fila
+                continue
+            if not fila:
+                vacias.append(fila)
+                continue
+            filas += vacias
+            vacias = []
+            filas.append(fila)
+            if len(filas) >= tamano:
+                yield _a_tabla(encabezado, filas[:tamano], inicio)
+                inicio += tamano
+                filas = filas[tamano:]
+        if filas:
+            yield _a_tabla(encabezado, filas, inicio)
+    finally:
+        libro.close()
+
+# ==========================================
+# EMPAREJAMIENTO DE BLOQUES EN PROCESOS
+# ==========================================
+
+class _HechosBloque:
+    """Lo que emparejar_filas usa de un Checkpoint, para un bloque que se procesa en otro proceso."""
+
+    def __init__(self, hechos):
+        self.hechos = hechos
+        self.nuevos = []
+
+    def obtener(self, fila, nombre):
+        return self.hechos.get((fila, nombre))
+
+    def registrar(self, fila, nombre, resultado):
+        self.nuevos.append((fila, nombre, resultado))
+
+def emparejar_bloque(fuente, presupuesto, df_bloque, hechos=None, con_crudo=False):
+    """
+    Empareja un bloque contra la BD (DataFrame preparado) o un IndiceBD.
+    hechos: (fila, nombre) -> resultado ya guardado en el checkpoint, o None.
+    Devuelve (df_bloque, crudo del bloque, resultados nuevos para el checkpoint).
+    """
+    crudo = {} if con_crudo else None
+    checkpoint = _HechosBloque(hechos) if hechos is not None else None
+    if isinstance(fuente, IndiceBD):
+        df_bloque = emparejar_indice(df_bloque, fuente, checkpoint, crudo, presupuesto)
+    else:
+        df_bloque = emparejar(df_bloque, fuente, checkpoint, crudo, presupuesto)
+    return df_bloque, crudo, checkpoint.nuevos if checkpoint else []
+
+_trabajador = {}
+
+def _iniciar_trabajador(fuente, presupuesto):
+    # La BD se manda una sola vez por proceso, no con cada bloque
+    _trabajador['fuente'] = fuente
+    _trabajador['presupuesto'] = presupuesto
+
+def _emparejar_en_trabajador(df_bloque, hechos, con_crudo):
+    return emparejar_bloque(_trabajador['fuente'], _trabajador['presupuesto'], df_bloque, hechos, con_crudo)
+
+def _contexto_procesos():
+    """
+    forkserver (spawn donde no existe, p.ej. Windows): el pool se crea con los
+    hilos de lectura y escritura corriendo, y hacer fork de un proceso con
+    hilos puede dejar al hijo trabado en un lock que tenia otro hilo.
+    """
+    metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(metodo)
+
+def emparejar_bloques(bloques, fuente, presupuesto=None, checkpoint=None, con_crudo=False, workers=1):
+    """
+    Empareja los bloques en orden. Con workers > 1 se reparten en procesos,
+    con hasta 2 x workers bloques en vuelo, y se devuelven en el orden de entrada.
+    """
+    def hechos_de(df_bloque):
+        if checkpoint is None:
+            return None
+        hechos = {}
+        for fila, nombre in df_bloque['Empresa_Limpia'].items():
+            resultado = checkpoint.obtener(fila, nombre)
+            if resultado is not None:
+                hechos[(fila, nombre)] = resultado
+        return hechos
+
+    def entregar(resultado):
+        df_bloque, crudo, nuevos = resultado
+        for fila, nombre, valores in nuevos:
+            checkpoint.registrar(fila, nombre, valores)
+        return df_bloque, crudo
+
+    if workers <= 1:
+        for df_bloque in bloques:
+            yield entregar(emparejar_bloque(fuente, presupuesto, df_bloque, hechos_de(df_bloque), con_crudo))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_contexto_procesos(),
+                             initializer=_iniciar_trabajador, initargs=(fuente, presupuesto)) as pool:
+        en_vuelo = deque()
+        for df_bloque in bloques:
+            en_vuelo.append(pool.submit(_emparejar_en_trabajador, df_bloque, hechos_de(df_bloque), con_crudo))
+            if len(en_vuelo) >= 2 * workers:
+                yield entregar(en_vuelo.popleft().result())
+        while en_vuelo:
+            yield entregar(en_vuelo.popleft().result())
+
+# ==========================================
+# ESCRITURA DEL REPORTE EN STREAMING
+# ==========================================
+
+def _estilo_estado(valor):
+    """Fill y Font de openpyxl equivalentes al CSS de colorear_celdas."""
+    css = dict(
+        (parte.split(':')[0].strip(), parte.split(':')[1].strip().lstrip('#'))
+        for parte in colorear_celdas(valor).split(';') if ':' in parte
+    )
+    if not css:
+        return None
+    return PatternFill(fill_type='solid', fgColor=css['background-color']), Font(color=css['color'])
+
+class EscritorReporte:
+    """
+    Escribe hojas de reporte fila por fila (openpyxl en modo write_only), con
+    los colores de exportar_reportes en la columna ESTADO.
+    """
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.libro = Workbook(write_only=True)
+        self.hojas = {}     # nombre -> (hoja, columnas)
+        self.estilos = {}
+
+    def agregar(self, hoja, df_final, columnas=None):
+        """Agrega las filas de df_final; la primera vez crea la hoja con sus columnas (o las indicadas)."""
+        if hoja not in self.hojas:
+            columnas = list(columnas or df_final.columns)
+            hoja_excel = self.libro.create_sheet(hoja)
+            hoja_excel.append(columnas)
+            self.hojas[hoja] = (hoja_excel, columnas)
+        hoja_excel, columnas = self.hojas[hoja]
+
+        df_final = df_final.reindex(columns=columnas, fill_value='')
+        k_estado = columnas.index('ESTADO')
+        for fila in df_final.itertuples(index=False, name=None):
+            valores = [None if pd.isna(v) else (v.item() if hasattr(v, 'item') else v) for v in fila]
+            estado = valores[k_estado]
+            if estado not in self.estilos:
+                self.estilos[estado] = _estilo_estado(estado)
+            if self.estilos[estado]:
+                celda = WriteOnlyCell(hoja_excel, value=estado)
+                celda.fill, celda.font = self.estilos[estado]
+                valores[k_estado] = celda
+            hoja_excel.append(valores)
+
+    def cerrar(self):
+        self.libro.save(self.archivo)
+
+# ==========================================
+# EJECUCION COMPLETA
+# ==========================================
+
+def ejecutar(args, modos):
+    """Version canalizada de cli.main (mismos argumentos, mismo resultado)."""
+    from .huellas import huella_emparejamiento
+    from .cli import abrir_checkpoint, archivo_por_modo, guardar_resultados_crudos, imprimir_degradadas, imprimir_listo
+
+    tiempos = {}
+    inicio = time.perf_counter()
+    workers = args.workers or os.cpu_count() or 1
+    tamano = args.tamano_bloque or TAMANO_BLOQUE
+
+    # La lectura y limpieza de la entrada arrancan ya, mientras se carga la BD
+    print(f"Leyendo {args.archivo} por bloques de {tamano} filas (canalizado, {workers} workers)...")
+    if workers <= 1:
+        print("AVISO: con un solo worker el emparejamiento comparte el GIL con la lectura y la escritura "
+              "y suele tardar mas que la ejecucion normal")
+    try:
+        libro, hoja_input = abrir_hoja(args.archivo, args.hoja_input)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    bloques = EnHilo(leer_bloques(libro, hoja_input, tamano), 'lectura', tiempos)
+    limpios = EnHilo((preparar_input(df) for df in bloques), 'limpieza', tiempos)
+
+    print("Cargando la Base de Datos...")
+    indice = None
+    try:
+        if args.indice:
+            indice = IndiceBD.cargar(args.indice)
+            df_bd = indice.como_bd()
+        else:
+            df_bd = preparar_bd(pd.read_excel(args.archivo_bd or args.archivo, sheet_name=args.hoja_bd))
+    except ValueError as e:
+        limpios.close()
+        print(f"ERROR: {e}")
+        return 1
+    if args.compacto:
+        from .memoria import compactar, uso_memoria, formato_bytes
+
+        # Solo la BD: los bloques de entrada se concatenan al final y sus categorias no coincidirian
+        antes = uso_memoria(df_bd)
+        if 'PAIS' in df_bd.columns:
+            del df_bd['PAIS']
+        compactar(df_bd)
+        print(f"  Memoria de la BD: {formato_bytes(antes)} -> {formato_bytes(uso_memoria(df_bd))}")
+    fuente = indice if indice is not None else df_bd
+
+    crudo = {} if args.crudo else None
+    if args.archivo_por_modo:
+        escritores = {politica: EscritorReporte(archivo_por_modo(args.salida, politica)) for politica in modos}
+        hojas = {politica: (escritores[politica], 'Reporte') for politica in modos}
+    else:
+        escritor = EscritorReporte(args.salida)
+        escritores = {None: escritor}
+        hojas = {politica: (escritor, 'Reporte' if len(modos) == 1 else f'Reporte {politica}') for politica in modos}
+
+    print("Emparejando y escribiendo el reporte por bloques...")
+    partes = []
+    conservar = ['Empresa_Limpia', 'MATCH_EN_BD', 'DEGRADADA'] if args.presupuesto is not None else []
+    columnas = None
+    huella = huella_emparejamiento(df_bd, args.presupuesto)
+    checkpoint = abrir_checkpoint(args, huella)
+    if checkpoint is None:
+        limpios.close()
+        return 1
+    with checkpoint:
+        emparejados = EnHilo(
+            emparejar_bloques(limpios, fuente, args.presupuesto, checkpoint, crudo is not None, workers),
+            'emparejamiento', tiempos,
+        )
+        # Escritura en este hilo, bloque por bloque y en el orden de entrada
+        tiempos['escritura'] = 0.0
+        for df_bloque, crudo_bloque in emparejados:
+            inicio_bloque = time.perf_counter()
+            for politica in modos:
+                df_bloque = calcular_semaforo(df_bloque, **POLITICAS_SEMAFORO[politica])
+                df_final = armar_reporte(df_bloque)
+                if columnas is None:
+                    # Con presupuesto, REVISION va siempre: no se sabe de antemano si alguna fila lo excede
+                    columnas = list(df_final.columns)
+                    if args.presupuesto is not None and 'REVISION' not in columnas:
+                        columnas.append('REVISION')
+                escritor, hoja = hojas[politica]
+                escritor.agregar(hoja, df_final, columnas)
+            # Del bloque ya escrito solo se guarda lo que se usa al final: todo para el
+            # sidecar, las columnas del resumen de degradadas con presupuesto, si no nada
+            if crudo is None:
+                df_bloque = df_bloque[conservar]
+            partes.append(df_bloque)
+            if crudo is not None:
+                crudo.update(crudo_bloque)
+            tiempos['escritura'] += time.perf_counter() - inicio_bloque
+        if args.resume:
+            print(f"  {checkpoint.reutilizados} filas reutilizadas del checkpoint")
+
+    inicio_guardado = time.perf_counter()
+    if partes:
+        df_input = pd.concat(partes)
+    else:
+        # Hoja vacia: mismas columnas que la ejecucion normal
+        df_input = emparejar_bloque(fuente, args.presupuesto, preparar_input(leer_input(
+            args.archivo, args.hoja_input)))[0]
+        for politica in modos:
+            df_input = calcular_semaforo(df_input, **POLITICAS_SEMAFORO[politica])
+            escritor, hoja = hojas[politica]
+            escritor.agregar(hoja, armar_reporte(df_input))
+    for escritor in escritores.values():
+        print(f"Guardando {escritor.archivo} ...")
+        escritor.cerrar()
+    if args.presupuesto is not None:
+        imprimir_degradadas(df_input, args.presupuesto, df_bd['Cliente_Limpio'].nunique())
+    if crudo is not None:
+        guardar_resultados_crudos(args, df_input, crudo, df_bd, indice)
+    tiempos['escritura'] += time.perf_counter() - inicio_guardado
+
+    checkpoint.borrar()
+    imprimir_listo(args, modos)
+    if args.tiempos:
+        print("  Tiempo de trabajo de cada etapa (se solapan entre si):")
+        for nombre, segundos in tiempos.items():
+            print(f"  {nombre:<15} {segundos:7.2f} s")
+        print(f"  {'total':<15} {time.perf_counter() - inicio:7.2f} s")
+    return 0
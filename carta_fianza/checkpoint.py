@@ -0,0 +1,116 @@
+"""
+Checkpoint de resultados de buscar_match en un archivo local append-only
+(JSON Lines), para poder reanudar una corrida larga despues de un corte.
+
+Cada linea guarda la huella de BD/configuracion, la fila del input, el nombre
+limpio buscado y el resultado. Al reanudar solo se reutilizan las lineas con
+la misma huella y el mismo nombre en la misma fila, asi que un cambio en la
+BD, en el algoritmo o en el archivo de entrada invalida lo que corresponda.
+
+El archivo va junto al reporte (<salida>.checkpoint.jsonl) y se borra cuando
+la corrida termina bien: solo queda si hay algo que reanudar.
+"""
+import json
+import os
+import time
+
+from .archivos import valor_json
+
+TAMANO_LOTE = 500        # filas acumuladas antes de escribir al disco
+SEGUNDOS_ENTRE_ESCRITURAS = 30
+
+def ruta_checkpoint(archivo_salida):
+    """Reporte_Final_Procesado.xlsx -> Reporte_Final_Procesado.checkpoint.jsonl"""
+    base, _ = os.path.splitext(archivo_salida)
+    return f'{base}.checkpoint.jsonl'
+
+def _a_clave(fila):
+    return valor_json(fila) if hasattr(fila, 'item') else fila
+
+class Checkpoint:
+    """
+    Uso:
+        with Checkpoint(ruta, huella, reanudar=True) as cp:
+            resultado = cp.obtener(fila, nombre)
+            ...
+            cp.registrar(fila, nombre, resultado)
+    """
+
+    def __init__(self, ruta, huella, reanudar=False, tamano_lote=TAMANO_LOTE,
+                 segundos=SEGUNDOS_ENTRE_ESCRITURAS):
+        self.ruta = ruta
+        self.huella = huella
+        self.tamano_lote = tamano_lote
+        self.segundos = segundos
+        self.hechos = {}
+        self.reutilizados = 0
+        self._pendientes = []
+        self._ultima_escritura = time.monotonic()
+
+        if reanudar:
+            self._cargar()
+        else:
+            # Corrida nueva: se descarta el checkpoint anterior
+            open(self.ruta, 'w', encoding='utf-8').close()
+
+    def _cargar(self):
+        if not os.path.exists(self.ruta):
+            return
+        completo = 0  # bytes hasta la ultima linea completa
+        with open(self.ruta, 'rb') as f:
+            for linea in f:
+                if not linea.endswith(b'\n'):
+                    break  # ultima linea cortada por el corte
+                completo += len(linea)
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+                if registro.get('huella') != self.huella:
+                    continue
+                self.hechos[(registro['fila'], registro['nombre'])] = tuple(registro['resultado'])
+
+        # Se quita la linea cortada para que lo nuevo no se pegue a ella
+        if completo < os.path.getsize(self.ruta):
+            with open(self.ruta, 'r+b') as f:
+                f.truncate(completo)
+
+    def obtener(self, fila, nombre):
+        """Resultado ya calculado para (fila, nombre), o None."""
+        resultado = self.hechos.get((_a_clave(fila), nombre))
+        if resultado is not None:
+            self.reutilizados += 1
+        return resultado
+
+    def registrar(self, fila, nombre, resultado):
+        self._pendientes.append(json.dumps(
+            {'huella': self.huella, 'fila': _a_clave(fila), 'nombre': nombre, 'resultado': list(resultado)},
+            ensure_ascii=False, default=valor_json,
+        ))
+        if (len(self._pendientes) >= self.tamano_lote
+                or time.monotonic() - self._ultima_escritura >= self.segundos):
+            self.vaciar()
+
+    def vaciar(self):
+        """Escribe al disco las filas pendientes."""
+        if self._pendientes:
+            with open(self.ruta, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(self._pendientes) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._pendientes = []
+        self._ultima_escritura = time.monotonic()
+
+    def borrar(self):
+        """Quita el archivo al terminar bien la corrida (ya no hay nada que reanudar)."""
+        self._pendientes = []
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # Se vacia tambien si hubo error: lo ya calculado no se pierde
+        self.vaciar()
+        return False
@@ -0,0 +1,298 @@
+"""
+Punto de entrada de carta-fianza.py, cf-conpaises.py y cf-sinpaises.py
+(tambien: python -m carta_fianza).
+
+pandas, thefuzz y openpyxl se importan recien en la etapa que los usa, asi
+que --help o un error en los argumentos no pagan ese costo. Por lo mismo,
+este modulo no debe importar nada pesado a nivel de modulo.
+"""
+import argparse
+import os
+import time
+from contextlib import contextmanager
+
+# ==========================================
+# PARAMETRIZACION DE ARCHIVOS Y HOJAS (valores por defecto)
+# ==========================================
+NOMBRE_ARCHIVO = 'prueba.xlsx'
+HOJA_INPUT = 'Credicorp'
+HOJA_BD = 'BD'
+ARCHIVO_SALIDA = 'Reporte_Final_Procesado.xlsx'
+
+# Politicas de semaforo (deben coincidir con reporte.POLITICAS_SEMAFORO):
+# con-pais: fuerza MORADO si el pais no coincide (cf-conpaises.py)
+# sin-pais: no valida el pais (cf-sinpaises.py)
+MODOS = ('con-pais', 'sin-pais')
+
+def crear_parser(modo='con-pais'):
+    parser = argparse.ArgumentParser(description="Empareja la hoja de entrada contra la BD y genera el Reporte.")
+    parser.add_argument('archivo', nargs='?', default=NOMBRE_ARCHIVO,
+                        help=f"Excel de entrada (por defecto {NOMBRE_ARCHIVO})")
+    parser.add_argument('--hoja-input', default=HOJA_INPUT, help=f"Hoja de entrada (por defecto {HOJA_INPUT})")
+    parser.add_argument('--hoja-bd', default=HOJA_BD, help=f"Hoja de la BD (por defecto {HOJA_BD})")
+    parser.add_argument('--archivo-bd', default=None,
+                        help="Leer la BD de otro Excel, p.ej. la tabla canonica de cf-dedup-bd.py")
+    parser.add_argument('--indice', default=None,
+                        help="Usar un indice de BD ya construido (cf-indice-bd.py) en vez de leer la hoja BD")
+    parser.add_argument('--salida', default=ARCHIVO_SALIDA, help=f"Excel de salida (por defecto {ARCHIVO_SALIDA})")
+    parser.add_argument('--modo', nargs='+', choices=MODOS + ('todos',), default=[modo],
+                        help=f"Semaforo(s) a aplicar sobre el mismo emparejamiento (por defecto {modo}). "
+                             "Con varios se escribe una hoja 'Reporte <modo>' por cada uno")
+    parser.add_argument('--archivo-por-modo', action='store_true',
+                        help="Con varios modos, escribir un Excel por modo (<salida>_<modo>.xlsx) en vez de una hoja")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reanuda la corrida anterior saltando las filas que ya estan en el checkpoint")
+    parser.add_argument('--checkpoint', default=None,
+                        help="Archivo de checkpoint (por defecto <salida>.checkpoint.jsonl; se borra si la "
+                             "corrida termina bien)")
+    parser.add_argument('--presupuesto', type=int, default=None,
+                        help="Trabajo maximo por fila (caracteres del nombre x nombres de la BD). Las filas que lo "
+                             "superan se emparejan solo por nombre exacto o palabras clave y quedan en MORADO")
+    parser.add_argument('--compacto', action='store_true',
+                        help="Guarda paises y semaforo como categoricas y los nombres como strings de Arrow "
+                             "para usar menos memoria; muestra el ahorro. Sin pyarrow los nombres no se "
+                             "compactan y el ahorro es chico")
+    parser.add_argument('--crudo', action='store_true',
+                        help="Guarda los resultados crudos (<salida>.crudo.json) que usa cf-rerender.py: "
+                             "unos 30 candidatos por fila en memoria y en disco, mas el tiempo de escribirlos")
+    parser.add_argument('--canalizado', action='store_true',
+                        help="Procesa la entrada por bloques: lectura, limpieza, emparejamiento y escritura "
+                             "corren a la vez, unidas por colas acotadas (el reporte es el mismo que sin --canalizado)")
+    parser.add_argument('--tamano-bloque', type=int, default=None,
+                        help="Con --canalizado, filas de entrada por bloque (por defecto 250)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Con --canalizado, procesos para el emparejamiento (por defecto todos los nucleos; "
+                             "si hay uno solo se usa la ejecucion normal)")
+    parser.add_argument('--tiempos', action='store_true', help="Muestra cuanto tardo cada etapa")
+    return parser
+
+def validar_argumentos(args):
+    """Validaciones baratas, antes de importar pandas. Devuelve un mensaje de error o None."""
+    for ruta in (args.archivo, args.archivo_bd, args.indice):
+        if ruta and not os.path.isfile(ruta):
+            return f"No se encontro el archivo {ruta}. Verifica que este en la misma carpeta."
+    for opcion, valor in (('--presupuesto', args.presupuesto), ('--tamano-bloque', args.tamano_bloque),
+                          ('--workers', args.workers)):
+        if valor is not None and valor <= 0:
+            return f"{opcion} debe ser mayor que 0"
+    directorio_salida = os.path.dirname(args.salida)
+    if directorio_salida and not os.path.isdir(directorio_salida):
+        return f"No existe la carpeta de salida {directorio_salida}"
+    return None
+
+@contextmanager
+def etapa(nombre, tiempos):
+    inicio = time.perf_counter()
+    yield
+    tiempos[nombre] = time.perf_counter() - inicio
+
+def archivo_por_modo(salida, modo):
+    base, extension = os.path.splitext(salida)
+    return f'{base}_{modo}{extension or ".xlsx"}'
+
+def imprimir_degradadas(df_input, presupuesto, n_corpus, maximo=10):
+    """Resumen de las filas que excedieron el presupuesto (van en MORADO con REVISION)."""
+    from .emparejamiento import trabajo_fila
+
+    degradadas = df_input[df_input['DEGRADADA'].astype(bool)]
+    if degradadas.empty:
+        print(f"Presupuesto por fila ({presupuesto}): ninguna fila lo excedio")
+        return
+    conteo = degradadas['DEGRADADA'].value_counts()
+    print(f"Presupuesto por fila ({presupuesto}): {len(degradadas)} filas lo excedieron y quedan en MORADO para revision "
+          f"({', '.join(f'{nivel}: {n}' for nivel, n in conteo.items())})")
+    for fila, nombre in degradadas['Empresa_Limpia'].head(maximo).items():
+        print(f"  fila {fila}: trabajo {trabajo_fila(nombre, n_corpus)} -> {degradadas.at[fila, 'MATCH_EN_BD']} "
+              f"[{degradadas.at[fila, 'DEGRADADA']}]  {nombre[:60]}")
+    if len(degradadas) > maximo:
+        print(f"  ... y {len(degradadas) - maximo} mas (columna REVISION del reporte)")
+
+def guardar_resultados_crudos(args, df_input, crudo, df_bd, indice=None):
+    """Escribe el sidecar <salida>.crudo.json para cf-rerender.py."""
+    from .crudo import guardar_crudo, ruta_crudo
+
+    if indice is not None:
+        obtener_registro = indice.registro
+        n_corpus = len(indice.corpus())
+    else:
+        # Primera fila de la BD por nombre limpio, igual que buscar_match
+        registros = df_bd.drop_duplicates('Cliente_Limpio').set_index('Cliente_Limpio')
+        tiene_codigo = 'CODUNICOCLI' in registros.columns
+
+        def obtener_registro(nombre):
+            codigo = registros.at[nombre, 'CODUNICOCLI'] if tiene_codigo else ""
+            return registros.at[nombre, 'CLIENTE'], codigo, registros.at[nombre, 'PAIS_BD']
+
+        n_corpus = len(registros)
+    salida_crudo = ruta_crudo(args.salida)
+    faltantes = guardar_crudo(salida_crudo, df_input, crudo, obtener_registro, n_corpus,
+                              meta={'archivo': args.archivo, 'hoja_input': args.hoja_input,
+                                    'presupuesto': args.presupuesto})
+    if faltantes:
+        print(f"AVISO: no se guardo {salida_crudo}: {faltantes} filas vinieron del checkpoint sin candidatos")
+    else:
+        print(f"Resultados crudos guardados en {salida_crudo} (para cf-rerender.py)")
+
+def abrir_checkpoint(args, huella):
+    """Checkpoint de la corrida, o None (con el error ya impreso) si no se puede escribir."""
+    from .checkpoint import Checkpoint
+
+    try:
+        return Checkpoint(args.checkpoint, huella, reanudar=args.resume)
+    except OSError as e:
+        print(f"ERROR: No se puede escribir el checkpoint {args.checkpoint}: {e.strerror or e}. "
+              "Usa --checkpoint con una ruta donde se pueda escribir.")
+        return None
+
+def imprimir_listo(args, modos):
+    if args.archivo_por_modo:
+        print("Reporte Listo! Se genero un archivo por modo, cada uno con su hoja 'Reporte' coloreada.")
+    elif len(modos) == 1:
+        print(f"Reporte Listo! Abre '{args.salida}'. La hoja 'Reporte' ya tiene los colores con sus resultados.")
+    else:
+        print(f"Reporte Listo! Abre '{args.salida}'. Hay una hoja 'Reporte <modo>' coloreada por cada modo.")
+
+def main(argv=None, modo='con-pais'):
+    args = crear_parser(modo).parse_args(argv)
+    modos = list(MODOS) if 'todos' in args.modo else list(dict.fromkeys(args.modo))
+    error = validar_argumentos(args)
+    if error:
+        print(f"ERROR: {error}")
+        return 1
+    if args.checkpoint is None:
+        from .checkpoint import ruta_checkpoint
+
+        # Junto al reporte: dos corridas con distinta --salida no se pisan el checkpoint
+        args.checkpoint = ruta_checkpoint(args.salida)
+    if args.canalizado:
+        if args.workers is None and (os.cpu_count() or 1) <= 1:
+            # Sin otro nucleo el emparejamiento corre en el proceso principal y compite
+            # por el GIL con la lectura y la escritura: la ejecucion normal es mas rapida
+            print("AVISO: hay un solo nucleo; --canalizado no mejoraria el tiempo, se usa la ejecucion normal")
+        else:
+            from .canalizado import ejecutar
+
+            return ejecutar(args, modos)
+    tiempos = {}
+
+    # ==========================================
+    # 1. CARGA DE DATOS
+    # ==========================================
+    print(f"Leyendo archivo: {args.archivo}...")
+    with etapa('carga', tiempos):
+        import pandas as pd
+        try:
+            from .limpieza import leer_input
+
+            df_input = leer_input(args.archivo, args.hoja_input)
+            if args.indice:
+                from .indice import IndiceBD
+
+                indice = IndiceBD.cargar(args.indice)
+            else:
+                df_bd = pd.read_excel(args.archivo_bd or args.archivo, sheet_name=args.hoja_bd)
+        except ValueError as e:  # hoja inexistente o indice invalido
+            print(f"ERROR: {e}")
+            return 1
+
+    # ==========================================
+    # 2. LIMPIEZA DE DATOS (NORMALIZACION)
+    # ==========================================
+    print("Limpiando nombres y estandarizando paises...")
+    with etapa('limpieza', tiempos):
+        from .limpieza import preparar_input, preparar_bd
+
+        df_input = preparar_input(df_input)
+        if args.indice:
+            df_bd = indice.como_bd()  # el indice ya trae la BD limpia
+        else:
+            df_bd = preparar_bd(df_bd)
+
+        if args.compacto:
+            from .memoria import compactar, uso_memoria, formato_bytes
+
+            antes = uso_memoria(df_input) + uso_memoria(df_bd)
+            if 'PAIS' in df_bd.columns:
+                del df_bd['PAIS']  # ya se normalizo en PAIS_BD
+            compactar(df_input)
+            compactar(df_bd)
+            despues = uso_memoria(df_input) + uso_memoria(df_bd)
+            print(f"  Memoria de entrada + BD: {formato_bytes(antes)} -> {formato_bytes(despues)} "
+                  f"({100 * (antes - despues) / antes:.0f}% menos)")
+
+    # ==========================================
+    # 3. ALGORITMO DE EMPAREJAMIENTO (FUZZY MATCHING)
+    # ==========================================
+    print("Buscando coincidencias en la Base de Datos...")
+    with etapa('emparejamiento', tiempos):
+        from .emparejamiento import emparejar
+        from .huellas import huella_emparejamiento
+
+        # Candidatos evaluados por fila, para el sidecar de cf-rerender.py
+        crudo = {} if args.crudo else None
+
+        # Ejecutamos la busqueda fila por fila, guardando el avance en el checkpoint
+        huella = huella_emparejamiento(df_bd, args.presupuesto)
+        checkpoint = abrir_checkpoint(args, huella)
+        if checkpoint is None:
+            return 1
+        with checkpoint:
+            if args.resume:
+                print(f"Reanudando: {len(checkpoint.hechos)} filas en el checkpoint {args.checkpoint}")
+            if args.indice:
+                from .indice import emparejar_indice
+
+                df_input = emparejar_indice(df_input, indice, checkpoint, crudo, args.presupuesto)
+            else:
+                df_input = emparejar(df_input, df_bd, checkpoint, crudo, args.presupuesto)
+            if args.resume:
+                print(f"  {checkpoint.reutilizados} filas reutilizadas del checkpoint")
+
+        if args.presupuesto is not None:
+            imprimir_degradadas(df_input, args.presupuesto, df_bd['Cliente_Limpio'].nunique())
+        if crudo is None:
+            # Su ultimo lector fue el emparejamiento (o el resumen de arriba); el sidecar es lo unico que la usa despues
+            del df_input['Empresa_Limpia']
+
+    # ==========================================
+    # 4. PREPARAR HOJA "REPORTE"
+    # ==========================================
+    print("Armando el reporte final...")
+    with etapa('reporte', tiempos):
+        from .reporte import POLITICAS_SEMAFORO, calcular_semaforo, armar_reporte, exportar_reporte, exportar_reportes
+
+        # Todas las politicas se aplican sobre el mismo emparejamiento
+        reportes = {}
+        for politica in modos:
+            df_input = calcular_semaforo(df_input, **POLITICAS_SEMAFORO[politica])
+            reportes[politica] = armar_reporte(df_input)
+        if crudo is None:
+            # El semaforo y armar_reporte fueron los ultimos en leerlas; lo que va al Excel ya esta en reportes
+            df_input.drop(columns=['Pais_Norm', 'DISTINTIVA_CORTA', 'CODUNICOCLI_BD', 'MATCH_EN_BD', 'PORCENTAJE',
+                                   'PAIS_MATCH', 'DEGRADADA', 'SEMAFORO'], inplace=True)
+
+    # ==========================================
+    # 5. EXPORTAR AL EXCEL CON COLORES
+    # ==========================================
+    with etapa('escritura', tiempos):
+        if args.archivo_por_modo:
+            for politica, df_final in reportes.items():
+                salida = archivo_por_modo(args.salida, politica)
+                print(f"Guardando {salida} ...")
+                exportar_reporte(df_final, salida)
+        elif len(reportes) == 1:
+            print(f"Guardando {args.salida} ...")
+            exportar_reporte(reportes[modos[0]], args.salida)
+        else:
+            print(f"Guardando {args.salida} ...")
+            exportar_reportes({f'Reporte {politica}': df_final for politica, df_final in reportes.items()}, args.salida)
+
+        if crudo is not None:
+            guardar_resultados_crudos(args, df_input, crudo, df_bd, indice if args.indice else None)
+
+    checkpoint.borrar()
+    imprimir_listo(args, modos)
+    if args.tiempos:
+        for nombre, segundos in tiempos.items():
+            print(f"  {nombre:<15} {segundos:7.2f} s")
+    return 0
@@ -0,0 +1,111 @@
+"""
+Resultados crudos del emparejamiento (sidecar del reporte).
+
+Por cada fila de entrada se guardan los candidatos evaluados (top 30 de
+token_set_ratio) con sus componentes de puntaje (fuzz, palabras clave,
+distintiva exacta). El registro de la BD de cada candidato (CLIENTE,
+CODUNICOCLI, PAIS_BD) se guarda una sola vez en una tabla por nombre
+limpio, aunque aparezca como candidato en muchas filas. Con eso
+cf-rerender.py vuelve a elegir el mejor candidato y a pintar el semaforo
+con otros pesos o cortes, sin leer la BD ni volver a emparejar.
+
+Con los 30 candidatos (TOP_K por defecto) el resultado es el mismo que una
+corrida completa con esos pesos, porque el PASO 1 no depende de ellos.
+"""
+import json
+import os
+from io import StringIO
+
+import pandas as pd
+
+from .emparejamiento import (
+    COLUMNAS_MATCH, PESOS, PUNTAJE_MINIMO, elegir_mejor, es_distintiva_corta,
+)
+from .archivos import escribir_json_atomico
+
+FORMATO = 'carta-fianza-crudo/2'
+TOP_K = 30
+
+def ruta_crudo(archivo_salida):
+    """Reporte_Final_Procesado.xlsx -> Reporte_Final_Procesado.crudo.json"""
+    base, _ = os.path.splitext(archivo_salida)
+    return f'{base}.crudo.json'
+
+def guardar_crudo(ruta, df_input, crudo, obtener_registro, n_corpus, meta=None, top_k=TOP_K):
+    """
+    Guarda el sidecar de una corrida.
+    - df_input: entrada ya emparejada (con Empresa_Limpia y COLUMNAS_MATCH)
+    - crudo: fila -> candidatos de puntuar_candidatos (lo que llena emparejar(crudo=...))
+    - obtener_registro(nombre_limpio) -> (CLIENTE, CODUNICOCLI, PAIS_BD)
+    - n_corpus: cantidad de nombres de la BD (0 = SIN DATA en todas las filas)
+    Devuelve la cantidad de filas sin candidatos guardados (p.ej. las que se
+    reutilizaron del checkpoint); si hay alguna no se escribe nada.
+    """
+    faltantes = sum(1 for fila in df_input.index if fila not in crudo)
+    if faltantes:
+        return faltantes
+
+    candidatos = {
+        str(fila): [
+            [candidato, puntaje_fuzz, score_palabras, bool(distintiva)]
+            for candidato, puntaje_fuzz, score_palabras, distintiva in crudo[fila][:top_k]
+        ]
+        for fila in df_input.index
+    }
+    # Un registro por nombre de la BD, no uno por candidato
+    registros = {}
+    for lista in candidatos.values():
+        for candidato, *_ in lista:
+            if candidato not in registros:
+                registros[candidato] = list(obtener_registro(candidato))
+    contenido = {
+        'meta': dict(meta or {}, formato=FORMATO, top_k=top_k, n_corpus=n_corpus),
+        'entrada': json.loads(df_input.to_json(orient='table', double_precision=15)),
+        'registros': registros,
+        'candidatos': candidatos,
+    }
+    escribir_json_atomico(ruta, contenido)
+    return 0
+
+def cargar_crudo(ruta):
+    """
+    Devuelve (meta, df_input, candidatos, registros): candidatos indexados por
+    fila y registros por nombre limpio.
+    """
+    with open(ruta, encoding='utf-8') as f:
+        contenido = json.load(f)
+    meta = contenido.get('meta', {})
+    if meta.get('formato') != FORMATO:
+        raise ValueError(f"{ruta} no es un archivo de resultados crudos valido")
+    df_input = pd.read_json(StringIO(json.dumps(contenido['entrada'])), orient='table')
+    candidatos = {int(fila): lista for fila, lista in contenido['candidatos'].items()}
+    return meta, df_input, candidatos, contenido['registros']
+
+def recalcular_matches(df_input, candidatos, registros, n_corpus, pesos=PESOS, minimo=PUNTAJE_MINIMO):
+    """
+    Vuelve a elegir el mejor candidato de cada fila con otros pesos y otro
+    puntaje minimo (misma logica que buscar_match) y reescribe COLUMNAS_MATCH.
+    Las filas degradadas por presupuesto se recalculan sobre los candidatos
+    de su nivel economico y siguen marcadas.
+    """
+    niveles = df_input['DEGRADADA'] if 'DEGRADADA' in df_input else pd.Series('', index=df_input.index)
+    resultados = []
+    for fila, nombre_buscado in df_input['Empresa_Limpia'].items():
+        if not nombre_buscado or len(nombre_buscado.strip()) < 2 or n_corpus == 0:
+            resultados.append(("SIN DATA", 0, "", "", False, ""))
+            continue
+
+        lista = candidatos[fila]
+        nivel = niveles[fila] or ""
+        mejor_match, mejor_puntaje = elegir_mejor([tuple(c) for c in lista], pesos)
+        if mejor_match is None or mejor_puntaje < minimo:
+            resultados.append(("SIN COINCIDENCIA", 0, "", "", False, nivel))
+            continue
+
+        cliente_original, codunicocli, pais_match = registros[mejor_match]
+        resultados.append((
+            cliente_original, int(mejor_puntaje), codunicocli, pais_match, es_distintiva_corta(nombre_buscado), nivel
+        ))
+
+    df_input[COLUMNAS_MATCH] = pd.DataFrame(resultados, index=df_input.index, columns=COLUMNAS_MATCH)
+    return df_input
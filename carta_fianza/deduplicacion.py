@@ -0,0 +1,288 @@
+"""
+Auto-deduplicacion de la BD: compara la BD contra si misma con el mismo
+score del matcher para encontrar clientes casi duplicados (misma empresa
+escrita distinto o registrada en varios paises).
+
+Para no comparar todos contra todos se usa bloqueo: dos nombres solo se
+comparan si comparten el prefijo de 5 letras de alguna palabra clave.
+Si la palabra distintiva no coincide (exacta o por prefijo de 5 letras),
+calcular_score_avanzado penaliza x0.6 y el puntaje combinado no pasa de 76,
+asi que con umbrales >= 77 el bloqueo no pierde pares.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from thefuzz import fuzz
+
+from .emparejamiento import extraer_palabras_clave, calcular_score_avanzado, puntaje_combinado
+
+# ==========================================
+# PARAMETROS
+# ==========================================
+UMBRAL_DUPLICADO = 95   # mismo corte que VERDE en el semaforo
+MAX_BLOQUE = 500        # bloques mas grandes vienen de palabras demasiado genericas
+TAMANO_LOTE = 5000      # pares (aprox.) por tarea enviada a cada proceso
+
+def claves_bloqueo(nombre):
+    """Prefijo de 5 letras de cada palabra clave (la palabra entera si es mas corta)."""
+    return {p[:5] for p in extraer_palabras_clave(nombre)}
+
+def puntaje_par(nombre_a, nombre_b):
+    """
+    Puntaje de duplicado entre dos nombres limpios.
+    calcular_score_avanzado no es simetrico (usa la palabra distintiva del
+    primero), asi que se toma el menor de los dos sentidos.
+    """
+    puntaje_fuzz = fuzz.token_set_ratio(nombre_a, nombre_b)
+    score_ab, distintiva_ab = calcular_score_avanzado(nombre_a, nombre_b)
+    score_ba, distintiva_ba = calcular_score_avanzado(nombre_b, nombre_a)
+    return min(
+        puntaje_combinado(puntaje_fuzz, score_ab, distintiva_ab),
+        puntaje_combinado(puntaje_fuzz, score_ba, distintiva_ba),
+    )
+
+def bloques_bloqueo(nombres, max_bloque=MAX_BLOQUE):
+    """
+    Devuelve (bloques, claves, omitidos):
+    - bloques: lista de (clave, ids) ordenada por clave, solo los de 2 a
+      max_bloque nombres (ids en orden creciente),
+    - claves: por cada nombre, sus claves que tienen bloque en la lista,
+    - omitidos: (clave, tamano) de los bloques demasiado grandes.
+    """
+    por_clave = {}
+    for i, nombre in enumerate(nombres):
+        for clave in claves_bloqueo(nombre):
+            por_clave.setdefault(clave, []).append(i)
+
+    bloques = []
+    omitidos = []
+    for clave, ids in sorted(por_clave.items()):
+        if len(ids) < 2:
+            continue
+        if len(ids) > max_bloque:
+            omitidos.append((clave, len(ids)))
+            continue
+        bloques.append((clave, ids))
+
+    claves = [set() for _ in nombres]
+    for clave, ids in bloques:
+        for i in ids:
+            claves[i].add(clave)
+    return bloques, claves, omitidos
+
+def _puntuar_bloques(args):
+    """
+    Puntua los pares (i, j), i < j, de cada bloque. Un par que comparte
+    varias claves cae en varios bloques: solo se puntua en el de su primera
+    clave compartida, asi cada par se compara una sola vez sin un set global.
+    Devuelve (pares comparados, pares que pasan el umbral).
+    """
+    lote, datos, umbral = args
+    comparados = 0
+    resultado = []
+    for clave, ids in lote:
+        for a in range(len(ids)):
+            i = ids[a]
+            nombre_i, claves_i = datos[i]
+            for j in ids[a + 1:]:
+                nombre_j, claves_j = datos[j]
+                if min(claves_i & claves_j) != clave:
+                    continue
+                comparados += 1
+                puntaje = puntaje_par(nombre_i, nombre_j)
+                if puntaje >= umbral:
+                    resultado.append((i, j, puntaje))
+    return comparados, resultado
+
+def _lotes(bloques, nombres, claves, umbral):
+    """Agrupa bloques en tareas de hasta TAMANO_LOTE pares (un bloque grande va solo)."""
+    lote = []
+    pares = 0
+    for clave, ids in bloques:
+        lote.append((clave, ids))
+        pares += len(ids) * (len(ids) - 1) // 2
+        if pares >= TAMANO_LOTE:
+            yield _tarea(lote, nombres, claves, umbral)
+            lote = []
+            pares = 0
+    if lote:
+        yield _tarea(lote, nombres, claves, umbral)
+
+def _tarea(lote, nombres, claves, umbral):
+    # Cada tarea lleva solo los nombres que usa para no copiar la BD entera
+    datos = {i: (nombres[i], claves[i]) for _, ids in lote for i in ids}
+    return lote, datos, umbral
+
+def buscar_duplicados(nombres, umbral=UMBRAL_DUPLICADO, workers=None, max_bloque=MAX_BLOQUE):
+    """
+    Compara los nombres que comparten alguna clave de bloqueo (en paralelo si
+    hay mas de un worker). Los pares se generan dentro de cada tarea, bloque
+    por bloque, y nunca se juntan todos en memoria.
+    Devuelve (duplicados, pares comparados, bloques omitidos); duplicados son
+    (i, j, puntaje) con i < j y puntaje >= umbral, ordenados.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    bloques, claves, omitidos = bloques_bloqueo(nombres, max_bloque)
+    tareas = _lotes(bloques, nombres, claves, umbral)
+
+    if workers <= 1:
+        parciales = map(_puntuar_bloques, tareas)
+    else:
+        parciales = _en_paralelo(tareas, workers)
+
+    comparados = 0
+    duplicados = []
+    for n, parcial in parciales:
+        comparados += n
+        duplicados.extend(parcial)
+    return sorted(duplicados), comparados, omitidos
+
+def _en_paralelo(tareas, workers):
+    """Resultados de _puntuar_bloques con a lo sumo 2 tareas por worker en vuelo."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_vuelo = deque()
+        for tarea in tareas:
+            en_vuelo.append(pool.submit(_puntuar_bloques, tarea))
+            if len(en_vuelo) >= 2 * workers:
+                yield en_vuelo.popleft().result()
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
+
+def _agrupar(n, aristas):
+    """Union-find sobre n nodos; devuelve la raiz de cada nodo."""
+    padre = list(range(n))
+
+    def raiz(x):
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]
+            x = padre[x]
+        return x
+
+    for i, j in aristas:
+        ri, rj = raiz(i), raiz(j)
+        if ri != rj:
+            padre[max(ri, rj)] = min(ri, rj)
+    return [raiz(x) for x in range(n)]
+
+def _separar_componente(ids, registros, vecinos):
+    """
+    Parte un componente conexo de duplicados en entidades donde TODOS los
+    miembros pasan el umbral contra el canonico (sin encadenar A~B~C).
+    El canonico de cada entidad es el nombre con mas registros que queda
+    sin asignar (en empate, el que aparece primero) y sus miembros son sus
+    vecinos aun sin asignar. Devuelve {id de nombre: id del canonico}.
+    """
+    pendientes = set(ids)
+    canonico_de = {}
+    for canonico in sorted(ids, key=lambda k: (-registros[k], k)):
+        if canonico not in pendientes:
+            continue
+        miembros = {canonico} | (vecinos.get(canonico, set()) & pendientes)
+        for k in miembros:
+            canonico_de[k] = canonico
+        pendientes -= miembros
+    return canonico_de
+
+def deduplicar_bd(df_bd, umbral=UMBRAL_DUPLICADO, workers=None, max_bloque=MAX_BLOQUE):
+    """
+    Agrupa los registros de la BD (ya pasada por preparar_bd) en entidades.
+
+    Devuelve (df_clusters, df_canonicos, resumen):
+    - df_clusters: un registro por fila de la BD que pertenece a un grupo de
+      mas de un registro, con su entidad y su puntaje contra el canonico.
+    - df_canonicos: una fila por entidad con las mismas columnas que la hoja
+      BD (CLIENTE, CODUNICOCLI, PAIS), lista para usarse como BD del matcher.
+    - resumen: conteos del proceso.
+    """
+    df_bd = df_bd.reset_index(drop=True)
+    nombres = df_bd['Cliente_Limpio'].unique().tolist()
+    id_nombre = {nombre: k for k, nombre in enumerate(nombres)}
+
+    duplicados, comparados, omitidos = buscar_duplicados(nombres, umbral, workers, max_bloque)
+    raices = _agrupar(len(nombres), [(i, j) for i, j, _ in duplicados])
+
+    # Los componentes conexos encadenan duplicados (A~B y B~C no implica A~C):
+    # cada uno se parte para que todo miembro pase el umbral contra su canonico
+    vecinos = {}
+    for i, j, _ in duplicados:
+        vecinos.setdefault(i, set()).add(j)
+        vecinos.setdefault(j, set()).add(i)
+    registros = df_bd['Cliente_Limpio'].map(id_nombre).value_counts().to_dict()
+    componentes = {}
+    for k, raiz in enumerate(raices):
+        componentes.setdefault(raiz, []).append(k)
+    canonico_de = {}
+    filas_separadas = 0
+    for ids in componentes.values():
+        if len(ids) < 2:
+            canonico_de[ids[0]] = ids[0]
+            continue
+        separados = _separar_componente(ids, registros, vecinos)
+        canonico_de.update(separados)
+        # Registros que el encadenamiento habria unido al canonico del componente bajo el umbral
+        principal = min(ids, key=lambda k: (-registros[k], k))
+        filas_separadas += sum(registros[k] for k in ids if separados[k] != principal)
+
+    # Entidad de cada fila de la BD = su canonico (nombres limpios identicos caen juntos)
+    entidad_fila = [canonico_de[id_nombre[nombre]] for nombre in df_bd['Cliente_Limpio']]
+
+    filas_por_entidad = {}
+    for fila, entidad in enumerate(entidad_fila):
+        filas_por_entidad.setdefault(entidad, []).append(fila)
+
+    tiene_codigo = 'CODUNICOCLI' in df_bd.columns
+    canonicos = []
+    clusters = []
+    for num, (entidad, filas) in enumerate(filas_por_entidad.items(), start=1):
+        conteo = {}
+        for fila in filas:
+            nombre = df_bd.at[fila, 'Cliente_Limpio']
+            conteo[nombre] = conteo.get(nombre, 0) + 1
+        nombre_canonico = nombres[entidad]
+        fila_canonica = next(f for f in filas if df_bd.at[f, 'Cliente_Limpio'] == nombre_canonico)
+        registro = df_bd.loc[fila_canonica]
+        paises = sorted(set(df_bd.loc[filas, 'PAIS_BD']))
+
+        canonicos.append({
+            'ID_ENTIDAD': num,
+            'CLIENTE': registro['CLIENTE'],
+            'CODUNICOCLI': registro['CODUNICOCLI'] if tiene_codigo else "",
+            'PAIS': registro['PAIS'],
+            'N_REGISTROS': len(filas),
+            'N_VARIANTES': len(conteo),
+            'PAISES': ', '.join(paises),
+        })
+
+        if len(filas) < 2:
+            continue
+        for fila in filas:
+            nombre = df_bd.at[fila, 'Cliente_Limpio']
+            clusters.append({
+                'ID_ENTIDAD': num,
+                'CLIENTE': df_bd.at[fila, 'CLIENTE'],
+                'Cliente_Limpio': nombre,
+                'CODUNICOCLI': df_bd.at[fila, 'CODUNICOCLI'] if tiene_codigo else "",
+                'PAIS': df_bd.at[fila, 'PAIS_BD'],
+                'ES_CANONICO': fila == fila_canonica,
+                'PUNTAJE_VS_CANONICO': 100 if nombre == nombre_canonico else int(puntaje_par(nombre, nombre_canonico)),
+            })
+
+    df_canonicos = pd.DataFrame(canonicos)
+    df_clusters = pd.DataFrame(clusters, columns=[
+        'ID_ENTIDAD', 'CLIENTE', 'Cliente_Limpio', 'CODUNICOCLI', 'PAIS', 'ES_CANONICO', 'PUNTAJE_VS_CANONICO'
+    ])
+    resumen = {
+        'registros_bd': len(df_bd),
+        'nombres_unicos': len(nombres),
+        'pares_comparados': comparados,
+        'pares_todos_contra_todos': len(nombres) * (len(nombres) - 1) // 2,
+        'pares_duplicados': len(duplicados),
+        'bloques_omitidos': omitidos,
+        'entidades': len(df_canonicos),
+        'grupos_con_duplicados': df_clusters['ID_ENTIDAD'].nunique(),
+        'filas_separadas_por_encadenamiento': filas_separadas,
+    }
+    return df_clusters, df_canonicos, resumen
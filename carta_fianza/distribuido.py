@@ -0,0 +1,186 @@
+"""
+Ejecucion repartida en varios nodos que solo comparten un filesystem,
+sin coordinador:
+
+    split  -> divide la hoja de entrada en N shards (archivos JSON autodescriptivos)
+    match  -> cada nodo procesa un shard contra la BD y deja su resultado al lado
+    merge  -> junta los resultados en el orden original y genera el Reporte
+
+Todos los pasos son deterministas e idempotentes: repetirlos produce los
+mismos archivos, y un match ya hecho con la misma BD no se vuelve a calcular.
+"""
+import glob
+import json
+import os
+from io import StringIO
+
+import pandas as pd
+
+from .limpieza import leer_input, preparar_input, preparar_bd
+from .emparejamiento import emparejar
+from .reporte import calcular_semaforo, armar_reporte
+from .huellas import huella_archivo, huella_bd
+from .archivos import escribir_json_atomico
+
+FORMATO = 'carta-fianza-shard/1'
+
+def nombre_shard(indice, total):
+    return f'shard_{indice:03d}_de_{total:03d}.json'
+
+def nombre_resultado(indice, total):
+    return f'resultado_{indice:03d}_de_{total:03d}.json'
+
+# ==========================================
+# LECTURA / ESCRITURA DE SHARDS
+# ==========================================
+
+def guardar_tabla(ruta, meta, df):
+    # orient='table' guarda el esquema, asi los tipos vuelven igual que en el Excel original
+    datos = json.loads(df.to_json(orient='table', double_precision=15))
+    escribir_json_atomico(ruta, {'meta': meta, 'datos': datos})
+
+def leer_tabla(ruta):
+    """Devuelve (meta, df) de un shard o resultado."""
+    with open(ruta, encoding='utf-8') as f:
+        contenido = json.load(f)
+    meta = contenido.get('meta', {})
+    if meta.get('formato') != FORMATO:
+        raise ValueError(f"{ruta} no es un shard valido (formato {meta.get('formato')!r})")
+    df = pd.read_json(StringIO(json.dumps(contenido['datos'])), orient='table')
+    return meta, df
+
+# ==========================================
+# SPLIT / MATCH / MERGE
+# ==========================================
+
+def dividir(nombre_archivo, n_shards, directorio, hoja_input='Credicorp', hoja_bd='BD', archivo_bd=None):
+    """
+    Divide la hoja de entrada en n_shards bloques contiguos de filas.
+    El id de corrida depende solo del archivo, la hoja y n_shards.
+    Devuelve la lista de rutas generadas.
+    """
+    if n_shards < 1:
+        raise ValueError("El numero de shards debe ser al menos 1")
+    df_input = leer_input(nombre_archivo, hoja_input)
+    df_input = df_input.reset_index(drop=True)
+    total = len(df_input)
+    id_corrida = huella_archivo(nombre_archivo, hoja_input, n_shards)
+
+    os.makedirs(directorio, exist_ok=True)
+    borrar_otras_corridas(directorio, id_corrida, n_shards)
+    rutas = []
+    for k in range(n_shards):
+        inicio = k * total // n_shards
+        fin = (k + 1) * total // n_shards
+        meta = {
+            'formato': FORMATO,
+            'tipo': 'shard',
+            'id_corrida': id_corrida,
+            'shard': k + 1,
+            'total_shards': n_shards,
+            'fila_inicio': inicio,
+            'fila_fin': fin,
+            'total_filas': total,
+            # Rutas absolutas: match puede correr en otra carpeta (u otro nodo con el mismo montaje)
+            'archivo_origen': os.path.abspath(nombre_archivo),
+            'hoja_input': hoja_input,
+            'archivo_bd': os.path.abspath(archivo_bd or nombre_archivo),
+            'hoja_bd': hoja_bd,
+        }
+        ruta = os.path.join(directorio, nombre_shard(k + 1, n_shards))
+        guardar_tabla(ruta, meta, df_input.iloc[inicio:fin])
+        rutas.append(ruta)
+    return rutas
+
+def borrar_otras_corridas(directorio, id_corrida, n_shards):
+    """
+    Borra del directorio los shards y resultados que no son de esta corrida,
+    para que un split repetido con otro --shards (u otro archivo) no deje
+    archivos viejos que hagan fallar el merge. Los resultados de la misma
+    corrida se conservan, asi un split repetido no obliga a rehacer los match.
+    """
+    sufijo = f'_de_{n_shards:03d}.json'
+    for ruta in glob.glob(os.path.join(directorio, 'shard_*_de_*.json')):
+        if not ruta.endswith(sufijo):
+            os.remove(ruta)
+    for ruta in glob.glob(os.path.join(directorio, 'resultado_*_de_*.json')):
+        if not ruta.endswith(sufijo) or _id_corrida(ruta) != id_corrida:
+            os.remove(ruta)
+
+def _id_corrida(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f).get('meta', {}).get('id_corrida')
+    except ValueError:
+        return None
+
+def procesar_shard(ruta_shard, directorio_salida=None, archivo_bd=None, hoja_bd=None, forzar=False,
+                   presupuesto=None):
+    """
+    Empareja un shard contra la BD y guarda el resultado junto al shard
+    (o en directorio_salida). Si ya existe un resultado de la misma corrida,
+    con la misma BD y el mismo presupuesto por fila, no se recalcula.
+    Devuelve (ruta_resultado, recalculado).
+    """
+    meta, df_shard = leer_tabla(ruta_shard)
+    directorio_salida = directorio_salida or os.path.dirname(ruta_shard)
+    ruta_resultado = os.path.join(directorio_salida, nombre_resultado(meta['shard'], meta['total_shards']))
+
+    df_bd = pd.read_excel(archivo_bd or meta['archivo_bd'], sheet_name=hoja_bd or meta['hoja_bd'])
+    df_bd = preparar_bd(df_bd)
+    huella = huella_bd(df_bd)
+
+    if not forzar and os.path.exists(ruta_resultado):
+        meta_previa, _ = leer_tabla(ruta_resultado)
+        if (meta_previa.get('id_corrida') == meta['id_corrida'] and meta_previa.get('huella_bd') == huella
+                and meta_previa.get('presupuesto') == presupuesto):
+            return ruta_resultado, False
+
+    df_shard = preparar_input(df_shard)
+    df_shard = emparejar(df_shard, df_bd, presupuesto=presupuesto)
+
+    meta_resultado = dict(meta, tipo='resultado', huella_bd=huella, presupuesto=presupuesto)
+    os.makedirs(directorio_salida, exist_ok=True)
+    guardar_tabla(ruta_resultado, meta_resultado, df_shard)
+    return ruta_resultado, True
+
+def unir(directorio, validar_pais=True):
+    """
+    Junta los resultados de todos los shards de una corrida en el orden
+    original de filas y devuelve (df_final, df_input).
+    Falla si faltan shards, si hay resultados de corridas distintas o si
+    los shards se emparejaron contra BDs distintas.
+    """
+    rutas = sorted(glob.glob(os.path.join(directorio, 'resultado_*_de_*.json')))
+    if not rutas:
+        raise FileNotFoundError(f"No hay resultados de shards en {directorio}")
+
+    metas = []
+    partes = []
+    for ruta in rutas:
+        meta, df = leer_tabla(ruta)
+        metas.append(meta)
+        partes.append(df)
+
+    corridas = {m['id_corrida'] for m in metas}
+    if len(corridas) > 1:
+        raise ValueError(f"Hay resultados de varias corridas en {directorio}: {sorted(corridas)}")
+    bds = {m['huella_bd'] for m in metas}
+    if len(bds) > 1:
+        raise ValueError("Los shards se emparejaron contra BDs distintas; vuelve a correr match con la misma BD")
+    presupuestos = {m.get('presupuesto') for m in metas}
+    if len(presupuestos) > 1:
+        raise ValueError(f"Los shards se emparejaron con presupuestos distintos: {sorted(presupuestos, key=str)}")
+
+    total_shards = metas[0]['total_shards']
+    presentes = {m['shard'] for m in metas}
+    faltantes = sorted(set(range(1, total_shards + 1)) - presentes)
+    if faltantes:
+        raise ValueError(f"Faltan resultados de los shards: {faltantes}")
+
+    df_input = pd.concat(partes).sort_index()
+    if len(df_input) != metas[0]['total_filas'] or not df_input.index.equals(pd.RangeIndex(len(df_input))):
+        raise ValueError("Los resultados no cubren exactamente las filas del archivo original")
+
+    df_input = calcular_semaforo(df_input, validar_pais=validar_pais)
+    return armar_reporte(df_input), df_input
@@ -0,0 +1,331 @@
+import pandas as pd
+from thefuzz import process, fuzz
+
+# Subir cuando cambie el algoritmo: invalida checkpoints y resultados guardados
+VERSION_EMPAREJAMIENTO = 1
+
+# Columnas que agrega emparejar() a la hoja de entrada.
+# DEGRADADA: nivel economico usado si la fila excedio el presupuesto ('' si no)
+COLUMNAS_MATCH = ['MATCH_EN_BD', 'PORCENTAJE', 'CODUNICOCLI_BD', 'PAIS_MATCH', 'DISTINTIVA_CORTA', 'DEGRADADA']
+
+# ==========================================
+# ALGORITMO DE EMPAREJAMIENTO (FUZZY MATCHING)
+# ==========================================
+
+# Palabras comunes que NO identifican a una empresa (stopwords)
+STOPWORDS = {
+    # Sufijos legales
+    'sa', 'sac', 'saa', 'eirl', 'ltd', 'inc', 'spa', 'corp', 'group', 'grupo',
+    # Articulos y preposiciones
+    'de', 'del', 'la', 'el', 'los', 'las', 'y', 'e', 'en', 'a', 'the', 'of',
+    # Paises
+    'peru', 'chile', 'colombia', 'bolivia', 'panama', 'per', 'chi', 'col', 'brasil', 'mexico',
+    # Tipos de empresa genericos
+    'empresa', 'empresas', 'compania', 'sociedad', 'corporacion', 'inversiones', 'holding', 'holdings',
+    'banco', 'bank', 'financial', 'financiera', 'financiero',
+    # Sectores/industrias (muy genericos)
+    'minera', 'mineras', 'minas', 'mineros', 'mining',
+    'energia', 'energy', 'generacion', 'distribucion', 'electrica', 'electric',
+    'construccion', 'construcciones', 'constructora',
+    'servicios', 'service', 'services', 'comercial', 'industrial',
+    'retail', 'internacional', 'international', 'sucursal',
+    # Otras palabras genericas que causan falsos positivos
+    'diagnostico', 'instituto', 'interconexion', 'operadores', 'operador',
+    'open', 'plaza', 'mall', 'centro', 'tienda', 'tiendas'
+}
+
+def extraer_palabras_clave(nombre):
+    """Extrae las palabras significativas de un nombre (no stopwords)."""
+    palabras = nombre.lower().split()
+    # Filtrar stopwords y palabras muy cortas
+    clave = [p for p in palabras if p not in STOPWORDS and len(p) >= 3]
+    return clave
+
+def obtener_palabra_distintiva(palabras_clave):
+    """
+    Obtiene la palabra MAS distintiva (la mas larga y unica).
+    Esta es la que DEBE coincidir para un match alto.
+    """
+    if not palabras_clave:
+        return None
+    # La palabra mas larga suele ser la mas distintiva
+    return max(palabras_clave, key=len)
+
+def calcular_score_avanzado(nombre_input, nombre_bd):
+    """
+    Calcula un score de similitud mas inteligente.
+    Prioriza coincidencias de palabras clave distintivas.
+    """
+    palabras_input = extraer_palabras_clave(nombre_input)
+    palabras_bd = extraer_palabras_clave(nombre_bd)
+    
+    if not palabras_input or not palabras_bd:
+        return 0, False
+    
+    # Palabra distintiva del input (la mas importante)
+    palabra_distintiva = obtener_palabra_distintiva(palabras_input)
+    
+    # 1. Buscar palabras clave exactas en comun
+    comunes_exactas = set(palabras_input) & set(palabras_bd)
+    
+    # 2. Verificar si la palabra distintiva coincide EXACTAMENTE
+    distintiva_coincide_exacta = palabra_distintiva in comunes_exactas if palabra_distintiva else False
+    
+    # 3. Verificar coincidencia parcial de palabra distintiva (prefijo 5+ chars)
+    distintiva_coincide_parcial = False
+    if palabra_distintiva and not distintiva_coincide_exacta:
+        for p_bd in palabras_bd:
+            if len(palabra_distintiva) >= 5 and len(p_bd) >= 5:
+                if palabra_distintiva[:5] == p_bd[:5]:
+                    distintiva_coincide_parcial = True
+                    break
+    
+    # 4. Buscar coincidencias parciales de otras palabras
+    comunes_parciales = 0
+    for p_in in palabras_input:
+        if p_in in comunes_exactas:
+            continue
+        for p_bd in palabras_bd:
+            if p_bd in comunes_exactas:
+                continue
+            min_len = min(len(p_in), len(p_bd))
+            if min_len >= 4:
+                prefijo = min(4, min_len)
+                if p_in[:prefijo] == p_bd[:prefijo]:
+                    comunes_parciales += 0.5
+                    break
+    
+    total_comunes = len(comunes_exactas) + comunes_parciales
+    max_palabras = max(len(palabras_input), len(palabras_bd))
+    
+    # Score base por palabras clave
+    score_palabras = (total_comunes / max_palabras) * 100 if max_palabras > 0 else 0
+    
+    # BONUS/PENALIZACION por palabra distintiva
+    if distintiva_coincide_exacta:
+        score_palabras = min(100, score_palabras + 30)  # Bonus grande
+    elif distintiva_coincide_parcial:
+        score_palabras = min(100, score_palabras + 15)  # Bonus medio
+    else:
+        # PENALIZAR si la palabra distintiva NO coincide
+        score_palabras = score_palabras * 0.6  # Penalizacion fuerte
+    
+    return score_palabras, distintiva_coincide_exacta
+
+# Pesos del puntaje combinado (cf-rerender.py permite probar otros sin re-emparejar)
+PESOS = {
+    'fuzz': 0.4,        # peso del token_set_ratio
+    'palabras': 0.6,    # peso del score de palabras clave
+    'bonus': 10,        # bonus si la palabra distintiva coincide exacta
+}
+
+# Puntaje minimo para aceptar un candidato; por debajo es SIN COINCIDENCIA
+PUNTAJE_MINIMO = 15
+
+def puntaje_combinado(puntaje_fuzz, score_palabras, distintiva_coincide, pesos=PESOS):
+    """Puntaje final de un candidato a partir de sus dos componentes."""
+    # Puntaje combinado: 40% fuzzy token_set + 60% palabras clave
+    puntaje_final = (puntaje_fuzz * pesos['fuzz']) + (score_palabras * pesos['palabras'])
+    
+    # BONUS si palabra distintiva coincide exacta
+    if distintiva_coincide:
+        puntaje_final = min(100, puntaje_final + pesos['bonus'])
+    return puntaje_final
+
+def es_distintiva_corta(nombre_buscado):
+    """True si la palabra distintiva del nombre tiene menos de 4 letras (None si no tiene)."""
+    palabras_input = extraer_palabras_clave(nombre_buscado)
+    palabra_distintiva = obtener_palabra_distintiva(palabras_input)
+    return palabra_distintiva and len(palabra_distintiva) < 4
+
+def puntuar_candidatos(nombre_buscado, lista_candidatos):
+    """
+    PASO 1 de buscar_match y los componentes del PASO 2.
+    Devuelve (puntuados, palabra_distintiva_corta), donde puntuados es la lista
+    de (candidato, puntaje_fuzz, score_palabras, distintiva_coincide) del top 30
+    en el orden de process.extract.
+    """
+    # PASO 1: Obtener top 30 candidatos usando token_set_ratio
+    top_candidatos = process.extract(
+        nombre_buscado, 
+        choices=lista_candidatos, 
+        scorer=fuzz.token_set_ratio,
+        limit=30
+    )
+    
+    if not top_candidatos:
+        return [], False
+    
+    # Obtener palabra distintiva del input para verificar si es corta
+    palabra_distintiva_corta = es_distintiva_corta(nombre_buscado)
+    
+    puntuados = []
+    for candidato, puntaje_fuzz in top_candidatos:
+        # Calcular score por palabras clave
+        score_palabras, distintiva_coincide = calcular_score_avanzado(nombre_buscado, candidato)
+        puntuados.append((candidato, puntaje_fuzz, score_palabras, distintiva_coincide))
+    return puntuados, palabra_distintiva_corta
+
+def elegir_mejor(puntuados, pesos=PESOS):
+    """PASO 2: el candidato con mayor puntaje combinado (el primero en caso de empate)."""
+    mejor_match = None
+    mejor_puntaje = 0
+    
+    for candidato, puntaje_fuzz, score_palabras, distintiva_coincide in puntuados:
+        puntaje_final = puntaje_combinado(puntaje_fuzz, score_palabras, distintiva_coincide, pesos)
+        
+        if puntaje_final > mejor_puntaje:
+            mejor_puntaje = puntaje_final
+            mejor_match = candidato
+    
+    return mejor_match, mejor_puntaje
+
+def mejor_candidato(nombre_buscado, lista_candidatos, puntuados=None):
+    """
+    PASOS 1 y 2 de buscar_match sobre una lista de candidatos.
+    Devuelve (mejor_match, mejor_puntaje, palabra_distintiva_corta);
+    mejor_match es None si no hay ningun candidato con puntaje.
+    Si se pasa una lista en puntuados, se le agregan los candidatos evaluados.
+    """
+    evaluados, palabra_distintiva_corta = puntuar_candidatos(nombre_buscado, lista_candidatos)
+    if puntuados is not None:
+        puntuados.extend(evaluados)
+    if not evaluados:
+        return None, 0, False
+
+    mejor_match, mejor_puntaje = elegir_mejor(evaluados)
+    return mejor_match, mejor_puntaje, palabra_distintiva_corta
+
+# ==========================================
+# PRESUPUESTO POR FILA Y NIVEL ECONOMICO
+# ==========================================
+# Nombres muy largos (consorcios, listas de empresas) cuestan mucho mas que
+# una fila tipica. Con un presupuesto, las filas cuyo trabajo estimado lo
+# superan se emparejan solo por nombre exacto o por palabras clave, y se
+# marcan para revision (MORADO en el semaforo).
+
+NIVEL_EXACTO = 'EXACTO'
+NIVEL_PALABRAS = 'PALABRAS CLAVE'
+
+# Candidatos que se puntuan como maximo en el nivel por palabras clave
+TOP_ECONOMICO = 30
+
+def trabajo_fila(nombre_buscado, n_candidatos):
+    """
+    Trabajo estimado de una fila: caracteres del nombre x nombres de la BD
+    (token_set_ratio recorre el nombre contra cada candidato). Se calcula
+    antes de emparejar, asi que el resultado no depende de la maquina.
+    """
+    return len(nombre_buscado) * n_candidatos
+
+def indice_palabras(lista_candidatos):
+    """palabra clave -> set de nombres de la BD que la contienen (como IndiceBD.por_palabra)."""
+    por_palabra = {}
+    for candidato in lista_candidatos:
+        for palabra in set(extraer_palabras_clave(candidato)):
+            por_palabra.setdefault(palabra, set()).add(candidato)
+    return por_palabra
+
+def candidatos_economicos(nombre_buscado, nombres_bd, por_palabra):
+    """
+    Candidatos del nivel economico: el mismo nombre si esta en la BD, si no
+    los que comparten mas palabras clave (hasta TOP_ECONOMICO).
+    Devuelve (nivel, candidatos).
+    """
+    if nombre_buscado in nombres_bd:
+        return NIVEL_EXACTO, [nombre_buscado]
+
+    compartidas = {}
+    for palabra in set(extraer_palabras_clave(nombre_buscado)):
+        for candidato in por_palabra.get(palabra, ()):
+            compartidas[candidato] = compartidas.get(candidato, 0) + 1
+    # Empates por nombre, para que el resultado no dependa del orden de los sets
+    candidatos = sorted(compartidas, key=lambda c: (-compartidas[c], c))[:TOP_ECONOMICO]
+    return NIVEL_PALABRAS, candidatos
+
+def elegir_candidato(nombre_buscado, lista_candidatos, puntuados=None, presupuesto=None,
+                     nombres_bd=None, por_palabra=None):
+    """
+    mejor_candidato con presupuesto por fila.
+    Devuelve (mejor_match, mejor_puntaje, palabra_distintiva_corta, nivel);
+    nivel es '' si la fila se emparejo completa.
+    """
+    if presupuesto is None or trabajo_fila(nombre_buscado, len(lista_candidatos)) <= presupuesto:
+        return (*mejor_candidato(nombre_buscado, lista_candidatos, puntuados), '')
+
+    if nombres_bd is None:
+        nombres_bd = set(lista_candidatos)
+    if por_palabra is None:
+        por_palabra = indice_palabras(lista_candidatos)
+    nivel, candidatos = candidatos_economicos(nombre_buscado, nombres_bd, por_palabra)
+    return (*mejor_candidato(nombre_buscado, candidatos, puntuados), nivel)
+
+def buscar_match(row, df_bd, puntuados=None, presupuesto=None, nombres_bd=None, por_palabra=None):
+    nombre_buscado = row['Empresa_Limpia']
+    
+    if not nombre_buscado or len(nombre_buscado.strip()) < 2:
+        return "SIN DATA", 0, "", "", False, ""
+    
+    lista_candidatos = df_bd['Cliente_Limpio'].unique().tolist()
+    if len(lista_candidatos) == 0:
+        return "SIN DATA", 0, "", "", False, ""
+
+    mejor_match, mejor_puntaje, palabra_distintiva_corta, nivel = elegir_candidato(
+        nombre_buscado, lista_candidatos, puntuados, presupuesto, nombres_bd, por_palabra
+    )
+    
+    if mejor_match is None or mejor_puntaje < PUNTAJE_MINIMO:
+        return "SIN COINCIDENCIA", 0, "", "", False, nivel
+
+    # Recuperamos el registro original de la BD
+    registro_bd = df_bd[df_bd['Cliente_Limpio'] == mejor_match].iloc[0]
+    cliente_original = registro_bd['CLIENTE']
+    codunicocli = registro_bd['CODUNICOCLI'] if 'CODUNICOCLI' in registro_bd else ""
+    pais_match = registro_bd['PAIS_BD']
+
+    return cliente_original, int(mejor_puntaje), codunicocli, pais_match, palabra_distintiva_corta, nivel
+
+def emparejar(df_input, df_bd, checkpoint=None, crudo=None, presupuesto=None):
+    """
+    Ejecuta buscar_match fila por fila y agrega COLUMNAS_MATCH a df_input.
+    Con un Checkpoint, las filas ya resueltas se reutilizan y las nuevas se van guardando.
+    Con un dict en crudo, se guardan ahi los candidatos evaluados de cada fila
+    (fila -> lista de puntuar_candidatos) para poder re-renderizar despues.
+    Con un presupuesto (ver trabajo_fila), las filas que lo exceden usan el nivel economico.
+    """
+    nombres_bd = por_palabra = None
+    if presupuesto is not None:
+        # Se arman una sola vez; solo los usan las filas que exceden el presupuesto
+        lista_candidatos = df_bd['Cliente_Limpio'].unique().tolist()
+        nombres_bd = set(lista_candidatos)
+        por_palabra = indice_palabras(lista_candidatos)
+
+    def buscar(row, puntuados=None):
+        return buscar_match(row, df_bd, puntuados, presupuesto, nombres_bd, por_palabra)
+
+    return emparejar_filas(df_input, buscar, checkpoint, crudo)
+
+def emparejar_filas(df_input, buscar, checkpoint=None, crudo=None):
+    """emparejar() con cualquier funcion buscar(row, puntuados=None) que devuelva la tupla de buscar_match."""
+    if df_input.empty:
+        for columna in COLUMNAS_MATCH:
+            df_input[columna] = pd.Series(dtype=object)
+        return df_input
+
+    def buscar_fila(row):
+        if crudo is None:
+            return buscar(row)
+        crudo[row.name] = []
+        return buscar(row, crudo[row.name])
+
+    def match_fila(row):
+        if checkpoint is None:
+            return pd.Series(buscar_fila(row))
+        resultado = checkpoint.obtener(row.name, row['Empresa_Limpia'])
+        if resultado is None:
+            resultado = buscar_fila(row)
+            checkpoint.registrar(row.name, row['Empresa_Limpia'], resultado)
+        return pd.Series(resultado)
+
+    df_input[COLUMNAS_MATCH] = df_input.apply(match_fila, axis=1)
+    return df_input
@@ -0,0 +1,183 @@
+"""
+Arnes diferencial: corre el emparejamiento de referencia (emparejar) y uno o
+mas motores alternativos sobre la misma entrada y compara fila por fila
+MATCH_EN_BD, PORCENTAJE, ESTADO e IDC, el recall del mejor match verdadero
+y el tiempo de cada uno.
+
+Un motor es cualquier funcion con la firma de emparejar(df_input, df_bd)
+que devuelva df_input con COLUMNAS_MATCH. Se registran en MOTORES o se pasan
+como 'paquete.modulo:funcion'.
+"""
+import importlib
+import random
+import time
+
+import pandas as pd
+
+from .limpieza import limpiar_nombre, mapa_paises
+from .emparejamiento import emparejar
+from .reporte import calcular_semaforo, armar_reporte
+from .indice import emparejar_con_indice
+
+# Columnas del reporte que un motor alternativo NO puede cambiar
+COLUMNAS_COMPARADAS = ['MATCH_EN_BD', 'PORCENTAJE', 'ESTADO', 'IDC']
+
+MOTORES = {
+    'referencia': emparejar,
+    'indice': emparejar_con_indice,
+}
+
+def cargar_motor(nombre):
+    """Busca el motor en MOTORES o lo importa de 'paquete.modulo:funcion'."""
+    if nombre in MOTORES:
+        return MOTORES[nombre]
+    if ':' not in nombre:
+        raise ValueError(f"Motor desconocido: {nombre} (usa uno de {sorted(MOTORES)} o 'modulo:funcion')")
+    modulo, funcion = nombre.split(':', 1)
+    return getattr(importlib.import_module(modulo), funcion)
+
+# ==========================================
+# ENTRADA SINTETICA
+# ==========================================
+
+def _perturbar(nombre, rnd):
+    """Variante realista de un nombre de la BD (mayusculas, sufijos, palabras, typos)."""
+    palabras = nombre.split()
+    cambio = rnd.choice(['mayusculas', 'minusculas', 'sufijo', 'quitar_palabra', 'typo', 'igual'])
+    if cambio == 'mayusculas':
+        return nombre.upper()
+    if cambio == 'minusculas':
+        return nombre.lower()
+    if cambio == 'sufijo':
+        return f"{nombre} {rnd.choice(['S.A.', 'S.A.C.', 'SAA', 'E.I.R.L.', 'y Filiales'])}"
+    if cambio == 'quitar_palabra' and len(palabras) > 2:
+        del palabras[rnd.randrange(len(palabras))]
+        return ' '.join(palabras)
+    if cambio == 'typo' and len(nombre) > 6:
+        k = rnd.randrange(1, len(nombre) - 1)
+        return nombre[:k] + nombre[k + 1] + nombre[k] + nombre[k + 2:]
+    return nombre
+
+def generar_sintetico(df_bd, n_filas, semilla=0, proporcion_sin_match=0.2):
+    """
+    Crea una hoja de entrada a partir de la BD (sin preparar) con la verdad
+    conocida en la columna CLIENTE_ESPERADO ('' para filas que no deberian
+    encontrar nada).
+    """
+    rnd = random.Random(semilla)
+    paises_input = {codigo: nombre.capitalize() for nombre, codigo in mapa_paises.items() if nombre.isascii()}
+    registros = df_bd.dropna(subset=['CLIENTE']).to_dict('records')
+    silabas = ['ka', 'lo', 'mi', 'ter', 'van', 'dor', 'sil', 'pra', 'qui', 'zen', 'tox', 'bru']
+
+    filas = []
+    for k in range(n_filas):
+        if not registros or rnd.random() < proporcion_sin_match:
+            inventado = ''.join(rnd.choice(silabas) for _ in range(4)).capitalize()
+            filas.append({
+                'Pais': rnd.choice(list(paises_input.values()) or ['Peru']),
+                'Nombre de la empresa': f"{inventado} {rnd.choice(['S.A.', 'SAC', 'Ltd'])}",
+                'IDC': '',
+                'Nemonico': f'SINT{k}',
+                'CLIENTE_ESPERADO': '',
+            })
+            continue
+        registro = rnd.choice(registros)
+        pais = str(registro.get('PAIS', '')).strip()
+        filas.append({
+            'Pais': paises_input.get(pais, pais),
+            'Nombre de la empresa': _perturbar(str(registro['CLIENTE']), rnd),
+            'IDC': '',
+            'Nemonico': f'SINT{k}',
+            'CLIENTE_ESPERADO': registro['CLIENTE'],
+        })
+    return pd.DataFrame(filas)
+
+# ==========================================
+# COMPARACION
+# ==========================================
+
+def correr_motor(motor, df_input, df_bd, validar_pais=True):
+    """Corre un motor sobre una copia de la entrada. Devuelve (df_final, segundos)."""
+    inicio = time.perf_counter()
+    df = motor(df_input.copy(), df_bd)
+    segundos = time.perf_counter() - inicio
+    df = calcular_semaforo(df, validar_pais=validar_pais)
+    return armar_reporte(df), segundos
+
+def _recall(df_final, esperado):
+    """Fraccion de filas con verdad no vacia cuyo match es el esperado (comparando nombres limpios)."""
+    con_verdad = esperado != ''
+    if not con_verdad.any():
+        return float('nan')
+    encontrados = df_final['NOMBRE_ENCONTRADO_BD'].apply(limpiar_nombre)
+    return float((encontrados[con_verdad] == esperado[con_verdad]).mean())
+
+def _iguales(a, b):
+    if pd.isna(a) and pd.isna(b):
+        return True
+    if (a == '' and pd.isna(b)) or (pd.isna(a) and b == ''):
+        return True
+    return a == b
+
+def comparar(df_input, df_bd, motores, validar_pais=True):
+    """
+    Corre 'referencia' y cada motor de la lista sobre la misma entrada ya
+    preparada. Devuelve (df_resumen, df_diferencias).
+
+    La verdad para el recall es CLIENTE_ESPERADO si existe (entrada
+    sintetica); si no, el match de la referencia.
+    """
+    final_ref, segundos_ref = correr_motor(MOTORES['referencia'], df_input, df_bd, validar_pais)
+
+    if 'CLIENTE_ESPERADO' in df_input.columns:
+        esperado = df_input['CLIENTE_ESPERADO'].fillna('').apply(limpiar_nombre)
+    else:
+        esperado = final_ref['NOMBRE_ENCONTRADO_BD'].apply(limpiar_nombre)
+        esperado = esperado.where(final_ref['%_COINCIDENCIA'] > 0, '')
+
+    resumen = [{
+        'MOTOR': 'referencia',
+        'FILAS': len(df_input),
+        'SEGUNDOS': round(segundos_ref, 3),
+        'ACELERACION': 1.0,
+        'RECALL_MEJOR_MATCH': _recall(final_ref, esperado),
+        **{f'DIF_{c}': 0 for c in COLUMNAS_COMPARADAS},
+    }]
+    diferencias = []
+    columnas_reporte = {'MATCH_EN_BD': 'NOMBRE_ENCONTRADO_BD', 'PORCENTAJE': '%_COINCIDENCIA',
+                        'ESTADO': 'ESTADO', 'IDC': 'IDC'}
+
+    for nombre in motores:
+        if nombre == 'referencia':
+            continue
+        final_alt, segundos_alt = correr_motor(cargar_motor(nombre), df_input, df_bd, validar_pais)
+        conteo = {}
+        for columna in COLUMNAS_COMPARADAS:
+            col = columnas_reporte[columna]
+            distintas = [
+                fila for fila in final_ref.index
+                if not _iguales(final_ref.at[fila, col], final_alt.at[fila, col])
+            ]
+            conteo[f'DIF_{columna}'] = len(distintas)
+            for fila in distintas:
+                diferencias.append({
+                    'MOTOR': nombre,
+                    'FILA': fila,
+                    'Nombre de la empresa': df_input.at[fila, 'Nombre de la empresa'],
+                    'COLUMNA': columna,
+                    'REFERENCIA': final_ref.at[fila, col],
+                    'ALTERNATIVO': final_alt.at[fila, col],
+                })
+        resumen.append({
+            'MOTOR': nombre,
+            'FILAS': len(df_input),
+            'SEGUNDOS': round(segundos_alt, 3),
+            'ACELERACION': round(segundos_ref / segundos_alt, 2) if segundos_alt > 0 else float('inf'),
+            'RECALL_MEJOR_MATCH': _recall(final_alt, esperado),
+            **conteo,
+        })
+
+    df_diferencias = pd.DataFrame(diferencias, columns=[
+        'MOTOR', 'FILA', 'Nombre de la empresa', 'COLUMNA', 'REFERENCIA', 'ALTERNATIVO'
+    ])
+    return pd.DataFrame(resumen), df_diferencias
@@ -0,0 +1,35 @@
+import hashlib
+
+from .emparejamiento import STOPWORDS, VERSION_EMPAREJAMIENTO
+
+# ==========================================
+# HUELLAS (FINGERPRINTS) PARA REPRODUCIBILIDAD
+# ==========================================
+
+# Columnas de la BD que influyen en el resultado de buscar_match
+COLUMNAS_HUELLA_BD = ['CLIENTE', 'Cliente_Limpio', 'CODUNICOCLI', 'PAIS_BD']
+
+def huella_texto(*partes):
+    """Hash corto (16 hex) de una secuencia de textos."""
+    h = hashlib.sha256()
+    for parte in partes:
+        h.update(str(parte).encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()[:16]
+
+def huella_archivo(ruta, *extras):
+    """Hash corto del contenido de un archivo mas parametros extra (hoja, etc.)."""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return huella_texto(h.hexdigest(), *extras)
+
+def huella_bd(df_bd):
+    """Hash corto del contenido de la BD ya preparada (independiente del archivo de origen)."""
+    columnas = [c for c in COLUMNAS_HUELLA_BD if c in df_bd.columns]
+    return huella_texto(df_bd[columnas].to_csv(index=False))
+
+def huella_emparejamiento(df_bd, presupuesto=None):
+    """Huella de BD + configuracion del algoritmo: si cambia, los resultados guardados no sirven."""
+    return huella_texto(huella_bd(df_bd), VERSION_EMPAREJAMIENTO, ' '.join(sorted(STOPWORDS)), presupuesto)
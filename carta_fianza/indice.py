@@ -0,0 +1,283 @@
+"""
+Indice persistente de la BD para el emparejamiento, con actualizacion
+incremental (delta) por CODUNICOCLI.
+
+El indice guarda cada fila de la BD ya limpia y mantiene:
+- el corpus de nombres limpios en el orden de la BD (lo que buscar_match
+  obtiene con df_bd['Cliente_Limpio'].unique()),
+- el mapa nombre limpio -> filas (el registro del match es la primera),
+- un indice por palabra clave (lo usa el nivel economico de --presupuesto).
+
+Una delta solo limpia las filas que cambian, en vez de reconstruir todo.
+Un delta es una tabla con OPERACION (ALTA / BAJA / CAMBIO), CODUNICOCLI,
+CLIENTE y PAIS:
+- ALTA agrega la fila al final de la BD,
+- BAJA quita todas las filas con ese CODUNICOCLI,
+- CAMBIO reemplaza en su lugar la unica fila con ese CODUNICOCLI.
+"""
+import json
+import math
+
+import pandas as pd
+
+from .limpieza import limpiar_nombre
+from .emparejamiento import (
+    extraer_palabras_clave, elegir_candidato, emparejar_filas, PUNTAJE_MINIMO, VERSION_EMPAREJAMIENTO,
+)
+from .archivos import escribir_json_atomico
+
+FORMATO = 'carta-fianza-indice/1'
+OPERACIONES = ('ALTA', 'BAJA', 'CAMBIO')
+
+def clave_codigo(codigo):
+    """Normaliza CODUNICOCLI para usarlo como clave (100012, 100012.0 y '100012' son el mismo)."""
+    if hasattr(codigo, 'item'):
+        codigo = codigo.item()
+    if isinstance(codigo, float):
+        if math.isnan(codigo):
+            return None
+        if codigo.is_integer():
+            return int(codigo)
+    if isinstance(codigo, str) and codigo.strip().isdigit():
+        return int(codigo.strip())
+    return codigo
+
+def _filas_bd(df):
+    """
+    (codigo, cliente, pais_bd, nombre_limpio) de cada fila, con la misma
+    limpieza que preparar_bd (sin quitar las filas vacias).
+    """
+    clientes = df['CLIENTE'].astype(str)
+    limpios = clientes.apply(limpiar_nombre)
+    paises = df['PAIS'].astype(str).str.strip()
+    codigos = df['CODUNICOCLI'] if 'CODUNICOCLI' in df.columns else pd.Series("", index=df.index)
+    return list(zip(codigos.tolist(), clientes.tolist(), paises.tolist(), limpios.tolist()))
+
+class IndiceBD:
+    """Indice de la BD; construir con desde_bd() o cargar(), actualizar con aplicar_delta()."""
+
+    def __init__(self):
+        self.filas = {}           # orden -> (codigo, cliente, pais_bd, nombre_limpio)
+        self.por_codigo = {}      # clave de CODUNICOCLI -> set de orden
+        self.por_nombre = {}      # nombre limpio -> set de orden
+        self.por_palabra = {}     # palabra clave -> set de nombres limpios
+        self.siguiente_orden = 0
+        self._corpus = None
+
+    # ==========================================
+    # CONSTRUCCION Y PERSISTENCIA
+    # ==========================================
+
+    @classmethod
+    def desde_bd(cls, df_bd):
+        """Construye el indice desde la hoja BD (cruda o ya pasada por preparar_bd)."""
+        indice = cls()
+        for fila in _filas_bd(df_bd):
+            indice._agregar(*fila)
+        return indice
+
+    def guardar(self, ruta):
+        contenido = {
+            'formato': FORMATO,
+            'version_emparejamiento': VERSION_EMPAREJAMIENTO,
+            'siguiente_orden': self.siguiente_orden,
+            'filas': [[orden, *fila] for orden, fila in sorted(self.filas.items())],
+        }
+        escribir_json_atomico(ruta, contenido)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with open(ruta, encoding='utf-8') as f:
+            contenido = json.load(f)
+        if contenido.get('formato') != FORMATO:
+            raise ValueError(f"{ruta} no es un indice de BD valido")
+        if contenido.get('version_emparejamiento') != VERSION_EMPAREJAMIENTO:
+            raise ValueError(f"{ruta} se creo con otra version del algoritmo; hay que reconstruirlo")
+        indice = cls()
+        # Las filas ya vienen limpias: cargar no vuelve a llamar a limpiar_nombre
+        for orden, codigo, cliente, pais_bd, limpio in contenido['filas']:
+            indice._agregar(codigo, cliente, pais_bd, limpio, orden=orden)
+        indice.siguiente_orden = contenido['siguiente_orden']
+        return indice
+
+    # ==========================================
+    # ALTAS Y BAJAS DE FILAS (MANTIENEN TODOS LOS INDICES)
+    # ==========================================
+
+    def _agregar(self, codigo, cliente, pais_bd, limpio, orden=None):
+        if orden is None:
+            orden = self.siguiente_orden
+        self.siguiente_orden = max(self.siguiente_orden, orden + 1)
+        self.filas[orden] = (codigo, cliente, pais_bd, limpio)
+        self.por_codigo.setdefault(clave_codigo(codigo), set()).add(orden)
+        if not limpio:
+            return  # preparar_bd descarta los nombres vacios
+
+        if limpio not in self.por_nombre:
+            self.por_nombre[limpio] = set()
+            for palabra in set(extraer_palabras_clave(limpio)):
+                self.por_palabra.setdefault(palabra, set()).add(limpio)
+        self.por_nombre[limpio].add(orden)
+        self._corpus = None
+
+    def _quitar(self, orden):
+        codigo, _, _, limpio = self.filas.pop(orden)
+        clave = clave_codigo(codigo)
+        self.por_codigo[clave].discard(orden)
+        if not self.por_codigo[clave]:
+            del self.por_codigo[clave]
+        if not limpio:
+            return
+
+        self.por_nombre[limpio].discard(orden)
+        if not self.por_nombre[limpio]:
+            del self.por_nombre[limpio]
+            for palabra in set(extraer_palabras_clave(limpio)):
+                self.por_palabra[palabra].discard(limpio)
+                if not self.por_palabra[palabra]:
+                    del self.por_palabra[palabra]
+        self._corpus = None
+
+    def aplicar_delta(self, df_delta):
+        """
+        Aplica un delta (ver docstring del modulo) y devuelve los conteos por operacion.
+        Si una operacion no es valida lanza ValueError; el indice puede quedar
+        aplicado a medias, asi que en ese caso no hay que guardarlo.
+        """
+        operaciones = df_delta['OPERACION'].astype(str).str.strip().str.upper().tolist()
+        invalidas = sorted(set(operaciones) - set(OPERACIONES))
+        if invalidas:
+            raise ValueError(f"Operaciones desconocidas en el delta: {invalidas} (validas: {OPERACIONES})")
+
+        conteo = dict.fromkeys(OPERACIONES, 0)
+        for operacion, (codigo, cliente, pais_bd, limpio) in zip(operaciones, _filas_bd(df_delta)):
+            existentes = sorted(self.por_codigo.get(clave_codigo(codigo), ()))
+            if operacion == 'ALTA':
+                self._agregar(codigo, cliente, pais_bd, limpio)
+            elif operacion == 'BAJA':
+                if not existentes:
+                    raise ValueError(f"BAJA de CODUNICOCLI {codigo}: no existe en el indice")
+                for orden in existentes:
+                    self._quitar(orden)
+            else:
+                if len(existentes) != 1:
+                    raise ValueError(f"CAMBIO de CODUNICOCLI {codigo}: hay {len(existentes)} filas con ese codigo")
+                self._quitar(existentes[0])
+                self._agregar(codigo, cliente, pais_bd, limpio, orden=existentes[0])
+            conteo[operacion] += 1
+        return conteo
+
+    # ==========================================
+    # CONSULTAS
+    # ==========================================
+
+    def corpus(self):
+        """Nombres limpios en el orden en que aparecen por primera vez en la BD."""
+        if self._corpus is None:
+            self._corpus = sorted(self.por_nombre, key=lambda nombre: min(self.por_nombre[nombre]))
+        return self._corpus
+
+    def registro(self, nombre_limpio):
+        """(CLIENTE, CODUNICOCLI, PAIS_BD) de la primera fila de la BD con ese nombre."""
+        codigo, cliente, pais_bd, _ = self.filas[min(self.por_nombre[nombre_limpio])]
+        return cliente, codigo, pais_bd
+
+    def como_bd(self):
+        """DataFrame con las columnas de la BD preparada (para huellas y compatibilidad)."""
+        filas = [fila for _, fila in sorted(self.filas.items()) if fila[3]]
+        return pd.DataFrame(filas, columns=['CODUNICOCLI', 'CLIENTE', 'PAIS_BD', 'Cliente_Limpio'])
+
+    def diferencias(self, otro):
+        """
+        Compara contra otro indice (p.ej. una reconstruccion completa) y
+        devuelve la lista de diferencias; vacia si son equivalentes.
+        El numero de orden puede diferir, solo importa el orden relativo.
+        """
+        difs = []
+        filas_a = [fila for _, fila in sorted(self.filas.items())]
+        filas_b = [fila for _, fila in sorted(otro.filas.items())]
+        if len(filas_a) != len(filas_b):
+            difs.append(f"filas: {len(filas_a)} vs {len(filas_b)}")
+        else:
+            distintas = sum(1 for a, b in zip(filas_a, filas_b) if _normalizar(a) != _normalizar(b))
+            if distintas:
+                difs.append(f"filas: {distintas} distintas")
+        if self.corpus() != otro.corpus():
+            difs.append("corpus: distinto orden o contenido")
+        else:
+            distintos = sum(
+                1 for nombre in self.corpus()
+                if _normalizar(self.registro(nombre)) != _normalizar(otro.registro(nombre))
+            )
+            if distintos:
+                difs.append(f"nombre -> registro: {distintos} distintos")
+        if self.por_palabra != otro.por_palabra:
+            difs.append("indice por palabra clave distinto")
+        return difs
+
+def _normalizar(fila):
+    return tuple(clave_codigo(valor) if not isinstance(valor, str) else valor for valor in fila)
+
+def aplicar_delta_bd(df_bd, df_delta):
+    """
+    Aplica un delta a la hoja BD cruda (misma semantica que IndiceBD.aplicar_delta).
+    Sirve para verificar el indice incremental contra una reconstruccion completa
+    (cf-indice-bd.py delta --verificar).
+    """
+    # object: un CAMBIO puede traer un CODUNICOCLI leido como texto ('100011')
+    # en una columna que en la BD es numerica
+    df_bd = df_bd.astype(object)
+    for _, cambio in df_delta.iterrows():
+        operacion = str(cambio['OPERACION']).strip().upper()
+        clave = clave_codigo(cambio['CODUNICOCLI'])
+        coinciden = df_bd['CODUNICOCLI'].map(clave_codigo) == clave
+        valores = {c: cambio[c] for c in df_bd.columns if c in cambio.index}
+        if operacion == 'ALTA':
+            df_bd = pd.concat([df_bd, pd.DataFrame([valores])], ignore_index=True)
+        elif operacion == 'BAJA':
+            if not coinciden.any():
+                raise ValueError(f"BAJA de CODUNICOCLI {cambio['CODUNICOCLI']}: no existe en la BD")
+            df_bd = df_bd[~coinciden].reset_index(drop=True)
+        elif operacion == 'CAMBIO':
+            if coinciden.sum() != 1:
+                raise ValueError(f"CAMBIO de CODUNICOCLI {cambio['CODUNICOCLI']}: hay {coinciden.sum()} filas con ese codigo")
+            fila = coinciden[coinciden].index[0]
+            for columna, valor in valores.items():
+                df_bd.at[fila, columna] = valor
+    return df_bd
+
+# ==========================================
+# EMPAREJAMIENTO CONTRA EL INDICE
+# ==========================================
+
+def buscar_match_indice(row, indice, puntuados=None, presupuesto=None):
+    """Mismo resultado que buscar_match, pero sin recorrer la BD en cada fila."""
+    nombre_buscado = row['Empresa_Limpia']
+
+    if not nombre_buscado or len(nombre_buscado.strip()) < 2:
+        return "SIN DATA", 0, "", "", False, ""
+
+    lista_candidatos = indice.corpus()
+    if len(lista_candidatos) == 0:
+        return "SIN DATA", 0, "", "", False, ""
+
+    # El nivel economico usa los indices por nombre y por palabra clave ya armados
+    mejor_match, mejor_puntaje, palabra_distintiva_corta, nivel = elegir_candidato(
+        nombre_buscado, lista_candidatos, puntuados, presupuesto, indice.por_nombre, indice.por_palabra
+    )
+
+    if mejor_match is None or mejor_puntaje < PUNTAJE_MINIMO:
+        return "SIN COINCIDENCIA", 0, "", "", False, nivel
+
+    cliente_original, codunicocli, pais_match = indice.registro(mejor_match)
+    return cliente_original, int(mejor_puntaje), codunicocli, pais_match, palabra_distintiva_corta, nivel
+
+def emparejar_indice(df_input, indice, checkpoint=None, crudo=None, presupuesto=None):
+    def buscar(row, puntuados=None):
+        return buscar_match_indice(row, indice, puntuados, presupuesto)
+
+    return emparejar_filas(df_input, buscar, checkpoint, crudo)
+
+def emparejar_con_indice(df_input, df_bd):
+    """Motor para cf-equivalencia.py: construye el indice y empareja contra el."""
+    return emparejar_indice(df_input, IndiceBD.desde_bd(df_bd))
@@ -0,0 +1,54 @@
+import re
+
+import pandas as pd
+
+# ==========================================
+# LIMPIEZA DE DATOS (NORMALIZACION)
+# ==========================================
+
+def limpiar_nombre(nombre):
+    if pd.isna(nombre): 
+        return ""
+    nombre = str(nombre).lower().strip()
+    # Quitamos sufijos comunes: S.A., S.A.C, SPA, etc.
+    nombre = re.sub(r'\b(s\.?a\.?c?\.?|e\.?i\.?r\.?l\.?|ltd|inc|y filiales|spa)\b', ' ', nombre)
+    # Quitamos "serie X"
+    nombre = re.sub(r'\bserie\s*"?[a-z0-9]+"?\b', ' ', nombre)
+    # Quitamos signos raros y normalizamos espacios
+    nombre = re.sub(r'[^\w\s]', ' ', nombre)
+    nombre = re.sub(r'\s+', ' ', nombre).strip()
+    return nombre
+
+# Diccionario para convertir el pais del Input al codigo en BD (CHI, PER, etc.)
+mapa_paises = {
+    'perú': 'PER', 'peru': 'PER',
+    'chile': 'CHI', 
+    'colombia': 'COL',
+    'bolivia': 'BOL'
+}
+
+def leer_input(archivo, hoja):
+    """
+    Lee la hoja de entrada dejando cada celda con su tipo de Excel (dtype=object):
+    un IDC guardado como texto ('00120') no se convierte en 120 aunque toda la
+    columna parezca numerica. La ejecucion canalizada lee igual, por bloques.
+    """
+    return pd.read_excel(archivo, sheet_name=hoja, dtype=object)
+
+def preparar_input(df_input):
+    """Agrega Empresa_Limpia y Pais_Norm a la hoja de entrada."""
+    df_input['Empresa_Limpia'] = df_input['Nombre de la empresa'].apply(limpiar_nombre)
+    df_input['Pais_Norm'] = df_input['Pais'].astype(str).str.lower().map(mapa_paises).fillna(df_input['Pais'])
+    return df_input
+
+def preparar_bd(df_bd):
+    """Agrega Cliente_Limpio y PAIS_BD a la BD y quita las filas sin nombre."""
+    df_bd['CLIENTE'] = df_bd['CLIENTE'].astype(str)
+    df_bd['Cliente_Limpio'] = df_bd['CLIENTE'].apply(limpiar_nombre)
+    df_bd['PAIS_BD'] = df_bd['PAIS'].astype(str).str.strip()
+
+    # Quitamos filas vacías de BD: take() copia una vez las filas que quedan, y si no hay vacias no se copia
+    vacias = (df_bd['Cliente_Limpio'] == '').to_numpy()
+    if vacias.any():
+        df_bd = df_bd.take((~vacias).nonzero()[0])
+    return df_bd
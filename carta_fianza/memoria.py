@@ -0,0 +1,48 @@
+"""
+Capa de datos compacta para consolidaciones grandes (carta-fianza.py --compacto).
+
+- Las columnas de pocos valores distintos (paises, semaforo) se guardan como
+  categoricas: un codigo entero por fila en vez de un string de Python.
+- Los nombres se guardan como strings de Arrow si pyarrow esta instalado
+  (un solo buffer contiguo en vez de un objeto de Python por celda); sin
+  pyarrow se dejan como estan y, como son la mayor parte de la memoria, el
+  ahorro es chico.
+
+Los valores no cambian, solo como se guardan: el reporte es el mismo.
+"""
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (solo se usa a traves de pandas)
+    TIPO_NOMBRES = pd.StringDtype('pyarrow')
+except ImportError:
+    TIPO_NOMBRES = None
+
+# Pocos valores distintos: PAIS/PAIS_BD de la BD, Pais_Norm de la entrada
+COLUMNAS_CATEGORICAS = ['PAIS', 'PAIS_BD', 'Pais_Norm']
+
+# Columnas de nombres (una por fila, casi todas distintas)
+COLUMNAS_NOMBRES = ['CLIENTE', 'Cliente_Limpio', 'Nombre de la empresa', 'Empresa_Limpia']
+
+def uso_memoria(df):
+    """Bytes que ocupa el DataFrame, contando el contenido de los strings."""
+    return int(df.memory_usage(deep=True).sum())
+
+def compactar(df):
+    """Convierte en el lugar las columnas de COLUMNAS_CATEGORICAS y COLUMNAS_NOMBRES que existan."""
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns and not isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = df[columna].astype('category')
+    if TIPO_NOMBRES is not None:
+        for columna in COLUMNAS_NOMBRES:
+            # Solo columnas de texto: un CLIENTE numerico no se toca
+            if columna in df.columns and pd.api.types.is_string_dtype(df[columna]):
+                df[columna] = df[columna].astype(TIPO_NOMBRES)
+    return df
+
+def formato_bytes(n):
+    for unidad in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f'{n:.0f} {unidad}' if unidad == 'B' else f'{n:.1f} {unidad}'
+        n /= 1024
+    return f'{n:.1f} GB'
@@ -0,0 +1,123 @@
+import pandas as pd
+
+# ==========================================
+# SEMAFORO Y HOJA "REPORTE"
+# ==========================================
+
+# Cortes del semaforo (cf-rerender.py permite probar otros sin re-emparejar)
+UMBRALES = {
+    'verde': 95,
+    'morado': 50,
+}
+
+def obtener_color(puntaje, palabra_distintiva_corta=False, pais_coincide=True, umbrales=UMBRALES, degradada=''):
+    # VERDE: Solo si estamos MUY seguros (>= 95%) Y el pais coincide
+    # MORADO: Revisar manualmente (50-94% O pais diferente O fila degradada)
+    # ROJO: No encontrado (< 50%)
+    
+    # Si la fila excedio el presupuesto solo se busco por nombre exacto o
+    # palabras clave: el resultado (o su ausencia) se revisa manualmente
+    if degradada:
+        return 'MORADO'
+    
+    # Si el pais NO coincide, forzar MORADO para revision manual
+    # (puede ser la misma empresa con sucursal en otro pais, necesita validacion)
+    if not pais_coincide and puntaje >= umbrales['morado']:
+        return 'MORADO'  # Pais diferente, requiere revision
+    
+    # Si la palabra distintiva es muy corta (<4 chars), forzar MORADO
+    # EXCEPTO si es match perfecto (100%)
+    if puntaje >= 100:
+        return 'VERDE'  # Match perfecto con pais correcto
+    elif puntaje >= umbrales['verde']:
+        if palabra_distintiva_corta:
+            return 'MORADO'  # Palabra muy corta, requiere revision
+        return 'VERDE'
+    elif puntaje >= umbrales['morado']:
+        return 'MORADO'
+    else:
+        return 'ROJO'
+
+# Colores posibles; SEMAFORO se guarda como categorica con estas categorias
+COLORES = ['VERDE', 'MORADO', 'ROJO']
+
+# Politicas de semaforo disponibles (argumentos de calcular_semaforo).
+# Todas se pueden aplicar sobre el mismo resultado de emparejar().
+POLITICAS_SEMAFORO = {
+    'con-pais': {'validar_pais': True},    # cf-conpaises.py
+    'sin-pais': {'validar_pais': False},   # cf-sinpaises.py
+}
+
+def calcular_semaforo(df_input, validar_pais=True, umbrales=UMBRALES):
+    """
+    Agrega la columna SEMAFORO a partir de las columnas del match.
+    Con validar_pais=False no se fuerza MORADO cuando el pais no coincide
+    (comportamiento de cf-sinpaises.py).
+    """
+    if validar_pais:
+        # Verificar si el pais del input coincide con el pais del match
+        # (solo lo usa el semaforo, no se guarda como columna)
+        pais_coincide = df_input['Pais_Norm'] == df_input['PAIS_MATCH']
+    else:
+        pais_coincide = pd.Series(True, index=df_input.index)
+
+    colores = df_input.apply(
+        lambda row: obtener_color(row['PORCENTAJE'], row['DISTINTIVA_CORTA'], pais_coincide[row.name], umbrales,
+                                  row.get('DEGRADADA', '')), axis=1, result_type='reduce'
+    )
+    df_input['SEMAFORO'] = pd.Categorical(colores, categories=COLORES)
+    return df_input
+
+def armar_reporte(df_input):
+    """Crea el DataFrame final con las columnas del reporte."""
+    df_final = pd.DataFrame()
+    df_final['Pais'] = df_input['Pais']
+    df_final['Nombre de la empresa'] = df_input['Nombre de la empresa']
+
+    # IDC: Si es VERDE, poner el CODUNICOCLI de la BD, si no, dejar el original
+    df_final['IDC'] = df_input.apply(
+        lambda row: row['CODUNICOCLI_BD'] if row['SEMAFORO'] == 'VERDE' else row.get('IDC', ''), axis=1
+    )
+
+    df_final['Nemonico'] = df_input.get('Nemonico', '')
+
+    # Se ha prestado carta fianza: SI cuando es VERDE, NO cuando es ROJO, vacio en MORADO
+    df_final['Se ha prestado servicio de carta fianza?'] = df_input['SEMAFORO'].apply(
+        lambda x: 'SI' if x == 'VERDE' else ('NO' if x == 'ROJO' else '')
+    )
+
+    df_final['NOMBRE_ENCONTRADO_BD'] = df_input['MATCH_EN_BD']
+    df_final['%_COINCIDENCIA'] = df_input['PORCENTAJE']
+    df_final['ESTADO'] = df_input['SEMAFORO']
+    df_final['PAIS_MATCH'] = df_input['PAIS_MATCH']  # para transparencia
+
+    # Solo si alguna fila excedio el presupuesto: por que quedo en MORADO
+    if 'DEGRADADA' in df_input and df_input['DEGRADADA'].astype(bool).any():
+        df_final['REVISION'] = df_input['DEGRADADA'].apply(
+            lambda nivel: f'PRESUPUESTO EXCEDIDO ({nivel})' if nivel else ''
+        )
+    return df_final
+
+# ==========================================
+# EXPORTAR AL EXCEL CON COLORES
+# ==========================================
+
+def colorear_celdas(val):
+    if val == 'VERDE':
+        return 'background-color: #C6EFCE; color: #006100' # Verde Excel
+    elif val == 'MORADO':
+        return 'background-color: #E6E6FA; color: #4B0082' # Morado suave
+    elif val == 'ROJO':
+        return 'background-color: #FFC7CE; color: #9C0006' # Rojo Excel
+    return ''
+
+def exportar_reporte(df_final, archivo_salida, hoja='Reporte'):
+    exportar_reportes({hoja: df_final}, archivo_salida)
+
+def exportar_reportes(reportes, archivo_salida):
+    """Escribe varios reportes (nombre de hoja -> df_final) en un mismo Excel."""
+    with pd.ExcelWriter(archivo_salida, engine='openpyxl') as writer:
+        for hoja, df_final in reportes.items():
+            df_final.style.map(colorear_celdas, subset=['ESTADO']).to_excel(
+                writer, sheet_name=hoja, index=False
+            )
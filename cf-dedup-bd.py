@@ -0,0 +1,88 @@
+import argparse
+
+# ==========================================
+# DUPLICADOS DENTRO DE LA BD
+# ==========================================
+# python cf-dedup-bd.py prueba.xlsx --salida Reporte_Duplicados_BD.xlsx
+# python carta-fianza.py prueba.xlsx --archivo-bd Reporte_Duplicados_BD.xlsx --hoja-bd Canonicos
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Busca clientes casi duplicados dentro de la BD y arma una "
+                                                 "tabla canonica (un registro por entidad).")
+    parser.add_argument('archivo', nargs='?', default='prueba.xlsx',
+                        help="Excel con la hoja BD (por defecto prueba.xlsx)")
+    parser.add_argument('--hoja-bd', default='BD', help="Hoja de la BD (por defecto BD)")
+    parser.add_argument('--salida', default='Reporte_Duplicados_BD.xlsx',
+                        help="Excel de salida (por defecto Reporte_Duplicados_BD.xlsx)")
+    parser.add_argument('--umbral', type=int, default=None,
+                        help="Puntaje minimo para considerar dos clientes el mismo (por defecto 95, igual que VERDE)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos en paralelo (por defecto todos los nucleos)")
+    return parser
+
+def colorear_canonico(val):
+    return 'background-color: #C6EFCE; color: #006100' if val is True else ''
+
+# El guard es necesario para el ProcessPoolExecutor en Windows: los procesos
+# hijos importan este archivo y no deben volver a leer argumentos ni la BD
+if __name__ == '__main__':
+    args = crear_parser().parse_args()
+    if args.umbral is not None and not 0 < args.umbral <= 100:
+        print("ERROR: --umbral debe estar entre 1 y 100")
+        raise SystemExit(1)
+    if args.workers is not None and args.workers <= 0:
+        print("ERROR: --workers debe ser mayor que 0")
+        raise SystemExit(1)
+
+    # Se importa despues de leer los argumentos para que --help no cargue pandas
+    import pandas as pd
+
+    from carta_fianza.limpieza import preparar_bd
+    from carta_fianza.deduplicacion import deduplicar_bd, UMBRAL_DUPLICADO
+
+    umbral = UMBRAL_DUPLICADO if args.umbral is None else args.umbral
+    if umbral < 77:
+        print(f"AVISO: con --umbral {umbral} el bloqueo puede no comparar algunos pares que lo superan "
+              "(solo es exacto desde 77)")
+
+    # ==========================================
+    # 1. CARGA Y LIMPIEZA DE LA BD
+    # ==========================================
+    print(f"Leyendo archivo: {args.archivo}...")
+    try:
+        df_bd = pd.read_excel(args.archivo, sheet_name=args.hoja_bd)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"ERROR: {e}")
+        raise SystemExit(1)
+
+    df_bd = preparar_bd(df_bd)
+
+    # ==========================================
+    # 2. BUSQUEDA DE DUPLICADOS (BD CONTRA SI MISMA)
+    # ==========================================
+    print("Buscando clientes duplicados dentro de la BD...")
+    df_clusters, df_canonicos, resumen = deduplicar_bd(df_bd, umbral=umbral, workers=args.workers)
+
+    print(f"  Registros en BD:        {resumen['registros_bd']}")
+    print(f"  Nombres unicos:         {resumen['nombres_unicos']}")
+    print(f"  Pares comparados:       {resumen['pares_comparados']} "
+          f"(de {resumen['pares_todos_contra_todos']} posibles)")
+    print(f"  Entidades resultantes:  {resumen['entidades']}")
+    print(f"  Grupos con duplicados:  {resumen['grupos_con_duplicados']}")
+    print(f"  Registros separados:    {resumen['filas_separadas_por_encadenamiento']} "
+          f"(el encadenamiento los habria unido con puntaje < {umbral} contra el canonico)")
+    for clave, tamano in resumen['bloques_omitidos']:
+        print(f"  AVISO: bloque '{clave}' omitido por generico ({tamano} nombres)")
+
+    # ==========================================
+    # 3. EXPORTAR REPORTE Y TABLA CANONICA
+    # ==========================================
+    print(f"Guardando {args.salida} ...")
+    with pd.ExcelWriter(args.salida, engine='openpyxl') as writer:
+        df_clusters.style.map(colorear_canonico, subset=['ES_CANONICO']).to_excel(
+            writer, sheet_name='Clusters', index=False
+        )
+        df_canonicos.to_excel(writer, sheet_name='Canonicos', index=False)
+
+    print(f"Listo! La hoja 'Canonicos' de '{args.salida}' se puede usar como BD "
+          f"(carta-fianza.py --archivo-bd {args.salida} --hoja-bd Canonicos).")
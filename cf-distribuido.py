@@ -0,0 +1,59 @@
+import argparse
+
+# ==========================================
+# EJECUCION REPARTIDA EN VARIOS NODOS
+# ==========================================
+# 1. python cf-distribuido.py split prueba.xlsx --shards 8 --dir shards
+# 2. (en cada nodo) python cf-distribuido.py match shards/shard_003_de_008.json
+# 3. python cf-distribuido.py merge shards --salida Reporte_Final_Procesado.xlsx
+
+parser = argparse.ArgumentParser(description="Carta Fianza repartida en shards (split / match / merge).")
+sub = parser.add_subparsers(dest='comando', required=True)
+
+p_split = sub.add_parser('split', help="Divide la hoja de entrada en N shards")
+p_split.add_argument('archivo', help="Excel de entrada (ej. prueba.xlsx)")
+p_split.add_argument('--shards', type=int, required=True, help="Numero de shards")
+p_split.add_argument('--dir', default='shards', help="Directorio compartido para los shards")
+p_split.add_argument('--hoja-input', default='Credicorp')
+p_split.add_argument('--hoja-bd', default='BD')
+p_split.add_argument('--archivo-bd', default=None, help="Excel de la BD si no es el mismo archivo")
+
+p_match = sub.add_parser('match', help="Procesa un shard contra la BD")
+p_match.add_argument('shard', help="Ruta del shard_XXX_de_YYY.json")
+p_match.add_argument('--salida-dir', default=None, help="Donde dejar el resultado (por defecto, junto al shard)")
+p_match.add_argument('--archivo-bd', default=None, help="Sobrescribe la BD indicada en el shard")
+p_match.add_argument('--hoja-bd', default=None)
+p_match.add_argument('--forzar', action='store_true', help="Recalcula aunque ya exista el resultado")
+p_match.add_argument('--presupuesto', type=int, default=None,
+                     help="Trabajo maximo por fila; las que lo superan usan el nivel economico (ver carta-fianza.py)")
+
+p_merge = sub.add_parser('merge', help="Junta los resultados y genera el Reporte")
+p_merge.add_argument('dir', help="Directorio con los resultado_XXX_de_YYY.json")
+p_merge.add_argument('--salida', default='Reporte_Final_Procesado.xlsx')
+p_merge.add_argument('--sin-pais', action='store_true', help="No forzar MORADO si el pais no coincide")
+
+args = parser.parse_args()
+
+# Se importa despues de leer los argumentos para que --help no cargue pandas
+from carta_fianza.distribuido import dividir, procesar_shard, unir
+
+try:
+    if args.comando == 'split':
+        rutas = dividir(args.archivo, args.shards, args.dir, args.hoja_input, args.hoja_bd, args.archivo_bd)
+        print(f"Generados {len(rutas)} shards en {args.dir}")
+
+    elif args.comando == 'match':
+        ruta, recalculado = procesar_shard(args.shard, args.salida_dir, args.archivo_bd, args.hoja_bd, args.forzar,
+                                           args.presupuesto)
+        print(f"{'Guardado' if recalculado else 'Ya estaba procesado'}: {ruta}")
+
+    elif args.comando == 'merge':
+        from carta_fianza.reporte import exportar_reporte
+
+        df_final, _ = unir(args.dir, validar_pais=not args.sin_pais)
+        print(f"Guardando {args.salida} ...")
+        exportar_reporte(df_final, args.salida)
+        print(f"Reporte Listo! Abre '{args.salida}'.")
+except (FileNotFoundError, ValueError) as e:
+    print(f"ERROR: {e}")
+    raise SystemExit(1)
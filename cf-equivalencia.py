@@ -0,0 +1,61 @@
+import argparse
+
+# ==========================================
+# ARNES DE EQUIVALENCIA ENTRE MOTORES
+# ==========================================
+# python cf-equivalencia.py prueba.xlsx --motor mi_paquete.rapido:emparejar
+# python cf-equivalencia.py prueba.xlsx --motor mi_paquete.rapido:emparejar --sintetico 2000
+
+parser = argparse.ArgumentParser(
+    description="Compara el emparejamiento de referencia contra motores alternativos."
+)
+parser.add_argument('archivo', help="Excel con las hojas de entrada y BD")
+parser.add_argument('--motor', action='append', default=[],
+                    help="Motor a comparar: nombre registrado en MOTORES o 'modulo:funcion' (se puede repetir)")
+parser.add_argument('--hoja-input', default='Credicorp')
+parser.add_argument('--hoja-bd', default='BD')
+parser.add_argument('--sintetico', type=int, default=0,
+                    help="En vez de la hoja de entrada, generar N filas sinteticas a partir de la BD")
+parser.add_argument('--semilla', type=int, default=0, help="Semilla de la entrada sintetica")
+parser.add_argument('--sin-pais', action='store_true', help="Semaforo sin validacion de pais")
+parser.add_argument('--salida', default='Reporte_Equivalencia.xlsx')
+args = parser.parse_args()
+
+# Se importa despues de leer los argumentos para que --help no cargue pandas
+import pandas as pd
+
+from carta_fianza.limpieza import preparar_input, preparar_bd
+from carta_fianza.equivalencia import comparar, generar_sintetico
+
+print(f"Leyendo archivo: {args.archivo}...")
+try:
+    df_bd_original = pd.read_excel(args.archivo, sheet_name=args.hoja_bd)
+    if args.sintetico:
+        df_input = generar_sintetico(df_bd_original, args.sintetico, args.semilla)
+    else:
+        df_input = pd.read_excel(args.archivo, sheet_name=args.hoja_input)
+except FileNotFoundError:
+    print("ERROR: No se encontro el archivo.")
+    raise SystemExit(1)
+
+df_input = preparar_input(df_input)
+df_bd = preparar_bd(df_bd_original)
+
+print(f"Comparando {len(df_input)} filas: referencia vs {', '.join(args.motor) or '(ninguno)'}...")
+try:
+    df_resumen, df_diferencias = comparar(df_input, df_bd, args.motor, validar_pais=not args.sin_pais)
+except (ValueError, ImportError, AttributeError) as e:
+    print(f"ERROR: {e}")
+    raise SystemExit(1)
+
+print(df_resumen.to_string(index=False))
+
+with pd.ExcelWriter(args.salida, engine='openpyxl') as writer:
+    df_resumen.to_excel(writer, sheet_name='Resumen', index=False)
+    df_diferencias.to_excel(writer, sheet_name='Diferencias', index=False)
+print(f"Detalle guardado en {args.salida}")
+
+# Codigo de salida distinto de 0 si algun motor cambia el semaforo (sirve como compuerta)
+if len(df_diferencias):
+    print(f"ATENCION: {len(df_diferencias)} diferencias contra la referencia")
+    raise SystemExit(2)
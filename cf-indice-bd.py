@@ -0,0 +1,65 @@
+import argparse
+import time
+
+# ==========================================
+# INDICE PERSISTENTE DE LA BD
+# ==========================================
+# 1. python cf-indice-bd.py construir prueba.xlsx --indice indice_bd.json
+# 2. (cada mes) python cf-indice-bd.py delta indice_bd.json cambios.xlsx
+# 3. python carta-fianza.py prueba.xlsx --indice indice_bd.json
+
+parser = argparse.ArgumentParser(description="Construye o actualiza (por delta) el indice persistente de la BD.")
+sub = parser.add_subparsers(dest='comando', required=True)
+
+p_construir = sub.add_parser('construir', help="Construye el indice completo desde la hoja BD")
+p_construir.add_argument('archivo', help="Excel con la hoja BD")
+p_construir.add_argument('--hoja-bd', default='BD')
+p_construir.add_argument('--indice', default='indice_bd.json', help="Archivo del indice")
+
+p_delta = sub.add_parser('delta', help="Aplica altas, bajas y cambios (por CODUNICOCLI) al indice")
+p_delta.add_argument('indice', help="Archivo del indice a actualizar")
+p_delta.add_argument('delta', help="Excel con columnas OPERACION (ALTA/BAJA/CAMBIO), CODUNICOCLI, CLIENTE, PAIS")
+p_delta.add_argument('--hoja', default=0, help="Hoja del delta (por defecto la primera)")
+p_delta.add_argument('--verificar', default=None, metavar='BD_ANTERIOR.xlsx',
+                     help="BD con la que estaba el indice antes del delta: se le aplica el mismo delta "
+                          "y el resultado se compara contra una reconstruccion completa")
+p_delta.add_argument('--hoja-bd', default='BD', help="Hoja de la BD para --verificar")
+
+args = parser.parse_args()
+
+# Se importa despues de leer los argumentos para que --help no cargue pandas
+import pandas as pd
+
+from carta_fianza.indice import IndiceBD, aplicar_delta_bd
+
+try:
+    if args.comando == 'construir':
+        inicio = time.perf_counter()
+        indice = IndiceBD.desde_bd(pd.read_excel(args.archivo, sheet_name=args.hoja_bd))
+        indice.guardar(args.indice)
+        print(f"Indice guardado en {args.indice}: {len(indice.filas)} filas, "
+              f"{len(indice.corpus())} nombres ({time.perf_counter() - inicio:.1f} s)")
+
+    elif args.comando == 'delta':
+        inicio = time.perf_counter()
+        indice = IndiceBD.cargar(args.indice)
+        df_delta = pd.read_excel(args.delta, sheet_name=args.hoja)
+        conteo = indice.aplicar_delta(df_delta)
+
+        if args.verificar:
+            df_bd = aplicar_delta_bd(pd.read_excel(args.verificar, sheet_name=args.hoja_bd), df_delta)
+            reconstruido = IndiceBD.desde_bd(df_bd)
+            diferencias = indice.diferencias(reconstruido)
+            if diferencias:
+                print("ERROR: el indice actualizado no coincide con la reconstruccion completa; no se guarda:")
+                for diferencia in diferencias:
+                    print(f"  - {diferencia}")
+                raise SystemExit(2)
+            print("Verificado: el indice actualizado coincide con la reconstruccion completa")
+
+        indice.guardar(args.indice)
+        print(f"Delta aplicado en {time.perf_counter() - inicio:.1f} s: "
+              + ', '.join(f"{n} {op}" for op, n in conteo.items()))
+except (FileNotFoundError, ValueError) as e:
+    print(f"ERROR: {e}")
+    raise SystemExit(1)
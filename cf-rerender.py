@@ -0,0 +1,76 @@
+import argparse
+
+# ==========================================
+# RE-RENDER DEL REPORTE CON OTROS CORTES Y PESOS
+# ==========================================
+# Usa el sidecar <salida>.crudo.json que deja carta-fianza.py, sin leer la BD:
+# python cf-rerender.py Reporte_Final_Procesado.crudo.json --verde 90 --morado 40
+
+parser = argparse.ArgumentParser(
+    description="Regenera el Reporte con otros cortes del semaforo o pesos del puntaje, sin re-emparejar."
+)
+parser.add_argument('crudo', help="Archivo .crudo.json generado por carta-fianza.py")
+parser.add_argument('--salida', default='Reporte_Rerender.xlsx')
+parser.add_argument('--verde', type=float, default=None, help="Puntaje minimo para VERDE (por defecto 95)")
+parser.add_argument('--morado', type=float, default=None, help="Puntaje minimo para MORADO (por defecto 50)")
+parser.add_argument('--peso-fuzz', type=float, default=None, help="Peso del token_set_ratio (por defecto 0.4)")
+parser.add_argument('--peso-palabras', type=float, default=None, help="Peso del score de palabras clave (por defecto 0.6)")
+parser.add_argument('--bonus', type=float, default=None, help="Bonus si la palabra distintiva coincide (por defecto 10)")
+parser.add_argument('--minimo', type=float, default=None, help="Puntaje minimo para aceptar un match (por defecto 15)")
+parser.add_argument('--modo', nargs='+', choices=('con-pais', 'sin-pais', 'todos'), default=['con-pais'],
+                    help="Semaforo(s) a aplicar; con varios se escribe una hoja por modo")
+args = parser.parse_args()
+
+# Se importa despues de leer los argumentos para que --help no cargue pandas
+import pandas as pd
+
+from carta_fianza.crudo import cargar_crudo, recalcular_matches
+from carta_fianza.emparejamiento import PESOS, PUNTAJE_MINIMO
+from carta_fianza.reporte import UMBRALES, POLITICAS_SEMAFORO, calcular_semaforo, armar_reporte, exportar_reportes
+
+pesos = dict(PESOS)
+for clave, valor in (('fuzz', args.peso_fuzz), ('palabras', args.peso_palabras), ('bonus', args.bonus)):
+    if valor is not None:
+        pesos[clave] = valor
+umbrales = dict(UMBRALES)
+for clave, valor in (('verde', args.verde), ('morado', args.morado)):
+    if valor is not None:
+        umbrales[clave] = valor
+minimo = PUNTAJE_MINIMO if args.minimo is None else args.minimo
+modos = list(POLITICAS_SEMAFORO) if 'todos' in args.modo else list(dict.fromkeys(args.modo))
+
+print(f"Leyendo resultados crudos: {args.crudo}...")
+try:
+    meta, df_input, candidatos, registros = cargar_crudo(args.crudo)
+except (FileNotFoundError, ValueError) as e:
+    print(f"ERROR: {e}")
+    raise SystemExit(1)
+
+print("Recalculando matches y semaforo...")
+df_input = recalcular_matches(df_input, candidatos, registros, meta['n_corpus'], pesos, minimo)
+reportes = {}
+for politica in modos:
+    df_input = calcular_semaforo(df_input, umbrales=umbrales, **POLITICAS_SEMAFORO[politica])
+    hoja = 'Reporte' if len(modos) == 1 else f'Reporte {politica}'
+    reportes[hoja] = armar_reporte(df_input)
+
+# Hoja con los parametros usados, para saber que escenario es cada archivo
+df_parametros = pd.DataFrame([
+    ('Resultados crudos', args.crudo),
+    ('Candidatos por fila (top K)', meta['top_k']),
+    ('VERDE desde', umbrales['verde']),
+    ('MORADO desde', umbrales['morado']),
+    ('Peso token_set_ratio', pesos['fuzz']),
+    ('Peso palabras clave', pesos['palabras']),
+    ('Bonus palabra distintiva', pesos['bonus']),
+    ('Puntaje minimo', minimo),
+], columns=['PARAMETRO', 'VALOR'])
+
+print(f"Guardando {args.salida} ...")
+exportar_reportes(reportes, args.salida)
+with pd.ExcelWriter(args.salida, engine='openpyxl', mode='a') as writer:
+    df_parametros.to_excel(writer, sheet_name='Parametros', index=False)
+
+conteo = reportes[next(iter(reportes))]['ESTADO'].value_counts()
+print("  " + ", ".join(f"{color}: {conteo.get(color, 0)}" for color in ('VERDE', 'MORADO', 'ROJO')))
+print(f"Reporte Listo! Abre '{args.salida}'.")
@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from carta_fianza.canalizado import abrir_hoja, leer_bloques
+from carta_fianza.cli import main
+
+IDCS = ['00123', '00456', 'ABC', 'X1']
+
+def _libro(ruta, idcs=IDCS):
+    libro = Workbook()
+    hoja = libro.active
+    hoja.title = 'Credicorp'
+    hoja.append(['Pais', 'Nombre de la empresa', 'IDC', 'Nemonico'])
+    for k, idc in enumerate(idcs):
+        hoja.append(['Peru', f'Consorcio Zentelqui {k}', idc, f'N{k}'])
+    bd = libro.create_sheet('BD')
+    bd.append(['CODUNICOCLI', 'CLIENTE', 'PAIS'])
+    bd.append([100001, 'Minera Kavantel S.A.', 'PER'])
+    bd.append([100002, 'Banco Lomirsil', 'CHI'])
+    libro.save(ruta)
+
+def test_bloque_solo_con_textos_numericos_no_cambia_de_tipo(tmp_path):
+    ruta = tmp_path / 'entrada.xlsx'
+    _libro(ruta)
+
+    # Con bloques de 2 filas, el primero solo tiene '00123' y '00456'
+    bloques = list(leer_bloques(*abrir_hoja(ruta, 'Credicorp'), tamano=2))
+    assert bloques[0]['IDC'].tolist() == ['00123', '00456']
+    assert pd.concat(bloques)['IDC'].tolist() == IDCS
+
+@pytest.mark.parametrize('workers', ['1', '2'])
+@pytest.mark.parametrize('idcs', [IDCS, ['00120', '00121', '00122']])
+def test_canalizado_igual_a_la_ejecucion_normal(tmp_path, idcs, workers):
+    # La segunda columna IDC parece numerica entera: ninguno de los dos caminos la convierte
+    ruta = tmp_path / 'entrada.xlsx'
+    _libro(ruta, idcs)
+    normal = tmp_path / 'normal.xlsx'
+    canalizado = tmp_path / 'canalizado.xlsx'
+    checkpoint = str(tmp_path / 'cp.jsonl')
+
+    assert main([str(ruta), '--salida', str(normal), '--checkpoint', checkpoint]) == 0
+    assert main([str(ruta), '--salida', str(canalizado), '--checkpoint', checkpoint,
+                 '--canalizado', '--tamano-bloque', '2', '--workers', workers]) == 0
+    df_normal = pd.read_excel(normal, dtype=object)
+    pd.testing.assert_frame_equal(df_normal, pd.read_excel(canalizado, dtype=object))
+    assert df_normal['IDC'].tolist() == idcs
@@ -0,0 +1,126 @@
+import json
+import types
+
+import pytest
+from openpyxl import Workbook
+
+from carta_fianza import checkpoint as modulo
+from carta_fianza import reporte
+from carta_fianza.checkpoint import Checkpoint
+from carta_fianza.cli import main
+
+RESULTADO = ('Minera Kavantel', 100001, 'PER', 97)
+
+def _lineas(ruta):
+    return ruta.read_text(encoding='utf-8').splitlines()
+
+def test_reanudar_quita_la_ultima_linea_cortada(tmp_path):
+    ruta = tmp_path / 'cp.jsonl'
+    with Checkpoint(str(ruta), 'h1') as cp:
+        cp.registrar(0, 'minera kavantel', RESULTADO)
+        cp.registrar(1, 'banco lomirsil', RESULTADO)
+    completo = ruta.stat().st_size
+    with open(ruta, 'ab') as f:
+        f.write(b'{"huella": "h1", "fila": 2, "nom')  # corte a mitad de la escritura
+
+    with Checkpoint(str(ruta), 'h1', reanudar=True) as cp:
+        assert set(cp.hechos) == {(0, 'minera kavantel'), (1, 'banco lomirsil')}
+        assert ruta.stat().st_size == completo
+        cp.registrar(2, 'otra', RESULTADO)
+
+    # Lo nuevo queda en su propia linea, no pegado al pedazo cortado
+    assert [json.loads(linea)['fila'] for linea in _lineas(ruta)] == [0, 1, 2]
+
+def test_reanudar_solo_usa_la_misma_huella(tmp_path):
+    ruta = tmp_path / 'cp.jsonl'
+    with Checkpoint(str(ruta), 'vieja') as cp:
+        cp.registrar(0, 'minera kavantel', RESULTADO)
+    with Checkpoint(str(ruta), 'nueva', reanudar=True) as cp:
+        cp.registrar(1, 'banco lomirsil', RESULTADO)
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write('no es json\n')
+
+    cp = Checkpoint(str(ruta), 'nueva', reanudar=True)
+    assert cp.obtener(0, 'minera kavantel') is None
+    assert cp.obtener(1, 'banco lomirsil') == RESULTADO
+    assert cp.obtener(1, 'otro nombre') is None  # el nombre de esa fila cambio en la entrada
+    assert cp.reutilizados == 1
+
+def test_sin_reanudar_se_descarta_el_anterior(tmp_path):
+    ruta = tmp_path / 'cp.jsonl'
+    with Checkpoint(str(ruta), 'h1') as cp:
+        cp.registrar(0, 'minera kavantel', RESULTADO)
+    assert Checkpoint(str(ruta), 'h1').hechos == {}
+    assert ruta.read_text() == ''
+
+def test_escribe_por_lotes_de_tamano(tmp_path):
+    ruta = tmp_path / 'cp.jsonl'
+    cp = Checkpoint(str(ruta), 'h1', tamano_lote=3, segundos=3600)
+    cp.registrar(0, 'a', RESULTADO)
+    cp.registrar(1, 'b', RESULTADO)
+    assert _lineas(ruta) == []
+    cp.registrar(2, 'c', RESULTADO)
+    assert len(_lineas(ruta)) == 3
+    cp.registrar(3, 'd', RESULTADO)
+    assert len(_lineas(ruta)) == 3
+    cp.vaciar()
+    assert len(_lineas(ruta)) == 4
+
+def test_escribe_por_tiempo(tmp_path, monkeypatch):
+    reloj = [100.0]
+    monkeypatch.setattr(modulo, 'time', types.SimpleNamespace(monotonic=lambda: reloj[0]))
+    ruta = tmp_path / 'cp.jsonl'
+    cp = Checkpoint(str(ruta), 'h1', tamano_lote=1000, segundos=30)
+    cp.registrar(0, 'a', RESULTADO)
+    reloj[0] = 129.0
+    cp.registrar(1, 'b', RESULTADO)
+    assert _lineas(ruta) == []
+    reloj[0] = 130.0
+    cp.registrar(2, 'c', RESULTADO)
+    assert len(_lineas(ruta)) == 3
+    # El plazo se cuenta desde la ultima escritura
+    reloj[0] = 150.0
+    cp.registrar(3, 'd', RESULTADO)
+    assert len(_lineas(ruta)) == 3
+
+def test_se_vacia_aunque_haya_error(tmp_path):
+    ruta = tmp_path / 'cp.jsonl'
+    with pytest.raises(KeyboardInterrupt):
+        with Checkpoint(str(ruta), 'h1', tamano_lote=1000, segundos=3600) as cp:
+            cp.registrar(0, 'a', RESULTADO)
+            raise KeyboardInterrupt
+    assert len(_lineas(ruta)) == 1
+
+def _libro(ruta):
+    libro = Workbook()
+    hoja = libro.active
+    hoja.title = 'Credicorp'
+    hoja.append(['Pais', 'Nombre de la empresa', 'IDC', 'Nemonico'])
+    hoja.append(['Peru', 'Minera Kavantel', 'A1', 'N1'])
+    hoja.append(['Chile', 'Banco Lomirsil SA', 'A2', 'N2'])
+    bd = libro.create_sheet('BD')
+    bd.append(['CODUNICOCLI', 'CLIENTE', 'PAIS'])
+    bd.append([100001, 'Minera Kavantel S.A.', 'PER'])
+    bd.append([100002, 'Banco Lomirsil', 'CHI'])
+    libro.save(ruta)
+
+def test_corrida_cortada_se_reanuda_y_al_terminar_se_borra(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    _libro(tmp_path / 'entrada.xlsx')
+    salida = tmp_path / 'reporte.xlsx'
+    checkpoint = tmp_path / 'reporte.checkpoint.jsonl'
+
+    def cortar(*args):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as m:
+        m.setattr(reporte, 'exportar_reporte', cortar)
+        with pytest.raises(KeyboardInterrupt):
+            main(['entrada.xlsx', '--salida', str(salida)])
+    assert len(_lineas(checkpoint)) == 2
+
+    assert main(['entrada.xlsx', '--salida', str(salida), '--resume']) == 0
+    assert '2 filas reutilizadas del checkpoint' in capsys.readouterr().out
+    assert salida.exists()
+    assert not checkpoint.exists()
+    assert not (tmp_path / 'carta-fianza.checkpoint.jsonl').exists()
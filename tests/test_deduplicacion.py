@@ -0,0 +1,83 @@
+import itertools
+import random
+
+import pandas as pd
+import pytest
+
+from carta_fianza.limpieza import preparar_bd
+from carta_fianza.deduplicacion import _separar_componente, buscar_duplicados, deduplicar_bd, puntaje_par
+
+RAICES = ['kavantel', 'lomirsil', 'tirdano', 'ombrevia', 'quenvara', 'andes', 'pacifico', 'norte', 'sur', 'agro',
+          'zentelqui', 'marlo']
+RELLENO = ['minera', 'grupo', 'de', 'la', 'servicios', 'peru', 'sac', 'transportes', 'logistica', 'del', 'and', 'cia']
+
+def _variante(palabra, azar):
+    # Errores de tipeo, incluido el de la primera letra (cambia el prefijo de bloqueo)
+    r = azar.random()
+    if r < 0.15 and len(palabra) > 5:
+        return palabra[:-1]
+    if r < 0.3:
+        return azar.choice('bcdkq') + palabra[1:]
+    if r < 0.45:
+        k = azar.randrange(len(palabra))
+        return palabra[:k] + azar.choice('aeiou') + palabra[k + 1:]
+    return palabra
+
+def _nombres(n=120, semilla=7):
+    azar = random.Random(semilla)
+    nombres = set()
+    while len(nombres) < n:
+        palabras = azar.sample(RAICES, azar.choice([1, 1, 2, 2, 3])) + azar.sample(RELLENO, azar.choice([0, 1, 2]))
+        azar.shuffle(palabras)
+        nombres.add(' '.join(_variante(p, azar) for p in palabras))
+    return sorted(nombres)
+
+@pytest.mark.parametrize('umbral', [77, 85, 95])
+def test_bloqueo_no_pierde_pares(umbral):
+    nombres = _nombres()
+    todos_contra_todos = [
+        (i, j) for i, j in itertools.combinations(range(len(nombres)), 2)
+        if puntaje_par(nombres[i], nombres[j]) >= umbral
+    ]
+    duplicados, comparados, _ = buscar_duplicados(nombres, umbral, workers=1, max_bloque=len(nombres))
+    assert todos_contra_todos  # el caso no es trivial
+    assert [(i, j) for i, j, _ in duplicados] == todos_contra_todos
+    assert comparados < len(nombres) * (len(nombres) - 1) // 2
+
+# A ~ B y B ~ C con umbral 95, pero A y C no llegan
+CADENA = ['kavantel andes', 'kavantel andes norte', 'kavantel norte']
+
+def test_cadena_se_parte_en_dos_entidades():
+    a, b, c = CADENA
+    assert puntaje_par(a, b) >= 95 and puntaje_par(b, c) >= 95 and puntaje_par(a, c) < 95
+    vecinos = {0: {1}, 1: {0, 2}, 2: {1}}
+
+    # A tiene mas registros: es canonico, B se une a A y C queda solo
+    assert _separar_componente([0, 1, 2], {0: 2, 1: 1, 2: 1}, vecinos) == {0: 0, 1: 0, 2: 2}
+    # Con B como canonico los tres pasan el umbral contra el
+    assert _separar_componente([0, 1, 2], {0: 1, 1: 2, 2: 1}, vecinos) == {0: 1, 1: 1, 2: 1}
+
+def _bd(clientes):
+    return preparar_bd(pd.DataFrame({
+        'CODUNICOCLI': range(100001, 100001 + len(clientes)),
+        'CLIENTE': clientes,
+        'PAIS': ['PER'] * len(clientes),
+    }))
+
+def test_cadena_en_deduplicar_bd():
+    df_clusters, df_canonicos, resumen = deduplicar_bd(_bd(['Kavantel Andes SAC', *CADENA]), workers=1)
+    assert df_clusters['PUNTAJE_VS_CANONICO'].min() >= 95
+    assert 'kavantel norte' not in df_clusters['Cliente_Limpio'].tolist()
+    assert len(df_canonicos) == 2
+    assert resumen['filas_separadas_por_encadenamiento'] == 1
+
+@pytest.mark.parametrize('umbral', [77, 85, 95])
+def test_todo_miembro_pasa_el_umbral_contra_su_canonico(umbral):
+    # Los nombres repetidos dan mas registros a algunos y cambian quien es canonico
+    nombres = _nombres()
+    df_clusters, _, _ = deduplicar_bd(_bd(nombres + nombres[::3]), umbral=umbral, workers=1)
+    assert not df_clusters.empty
+    for _, grupo in df_clusters.groupby('ID_ENTIDAD'):
+        canonico = grupo.loc[grupo['ES_CANONICO'], 'Cliente_Limpio'].iloc[0]
+        for nombre in grupo['Cliente_Limpio']:
+            assert nombre == canonico or puntaje_par(nombre, canonico) >= umbral
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from carta_fianza.indice import IndiceBD, aplicar_delta_bd, clave_codigo
+
+def _bd():
+    return pd.DataFrame({
+        'CODUNICOCLI': [100010, 100011, 100012, 100013, 100014],
+        'CLIENTE': ['Minera Kavantel S.A.', 'Banco Lomirsil', 'Pesquera Tirdano SAC',
+                    'Minera Kavantel', 'Textil Ombrevia EIRL'],
+        'PAIS': ['PER', 'CHI', 'PER', 'COL', 'BOL'],
+    })
+
+def _delta():
+    # Como sale de read_excel con una columna mixta: el CAMBIO trae el codigo como texto
+    return pd.DataFrame({
+        'OPERACION': ['ALTA', 'CAMBIO', 'BAJA', 'alta ', 'CAMBIO'],
+        'CODUNICOCLI': [100020, '100011', 100010, 'EXT-9', 100014.0],
+        'CLIENTE': ['Agricola Quenvara', 'Banco Lomirsil Internacional', None,
+                    'Minera Kavantel SA', 'Textil Ombrevia'],
+        'PAIS': ['PER', 'CHI', None, 'PER', 'BOL'],
+    }).astype(object)
+
+def test_delta_incremental_igual_a_reconstruir():
+    df_bd = _bd()
+    indice = IndiceBD.desde_bd(df_bd)
+    conteo = indice.aplicar_delta(_delta())
+    assert conteo == {'ALTA': 2, 'BAJA': 1, 'CAMBIO': 2}
+
+    df_nueva = aplicar_delta_bd(df_bd, _delta())
+    assert indice.diferencias(IndiceBD.desde_bd(df_nueva)) == []
+    assert df_nueva['CODUNICOCLI'].map(clave_codigo).tolist() == [100011, 100012, 100013, 100014, 100020, 'EXT-9']
+    assert df_nueva['CLIENTE'].tolist()[0] == 'Banco Lomirsil Internacional'
+    # La BAJA de la primera 'minera kavantel' deja como registro la siguiente fila con ese nombre
+    assert indice.registro('minera kavantel') == ('Minera Kavantel', 100013, 'COL')
+
+def test_delta_se_conserva_al_guardar_y_cargar(tmp_path):
+    indice = IndiceBD.desde_bd(_bd())
+    indice.aplicar_delta(_delta())
+    ruta = tmp_path / 'indice.json'
+    indice.guardar(ruta)
+    assert IndiceBD.cargar(ruta).diferencias(IndiceBD.desde_bd(aplicar_delta_bd(_bd(), _delta()))) == []
+
+def test_baja_de_codigo_inexistente():
+    delta = pd.DataFrame({'OPERACION': ['BAJA'], 'CODUNICOCLI': [999999], 'CLIENTE': [None], 'PAIS': [None]})
+    with pytest.raises(ValueError, match='999999'):
+        IndiceBD.desde_bd(_bd()).aplicar_delta(delta)
+    with pytest.raises(ValueError, match='999999'):
+        aplicar_delta_bd(_bd(), delta)